@@ -0,0 +1,146 @@
+#!/usr/bin/python3
+
+# Copyright (c) 2016, Teriks
+# All rights reserved.
+
+# startup.py is part of giftoa
+
+# giftoa is distributed under the following BSD 3-Clause License
+
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer
+#    in the documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Measures how long giftoa takes to start up, and checks that modules which giftoa
+# only imports when they are needed are not imported at startup.
+#
+# "giftoa --version" exits while parsing arguments.  With --build, a build which is found
+# in the artifact cache is timed too, which runs giftoa past tool discovery and loading
+# the toolchain cache, so it also measures any compiler probing that is not cached.
+#
+# Exits with a non zero status if either median time is slower than --max-ms, or if a
+# deferred module is imported by "giftoa --version".
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+script_path = os.path.dirname(os.path.realpath(__file__))
+src_path = os.path.dirname(script_path)
+
+giftoa_path = os.path.join(src_path, 'giftoa', 'giftoa.py')
+
+
+DEFERRED_MODULES = [
+    'imghdr',
+    'urllib.request',
+    'urllib.error',
+    'tempfile',
+    'platform',
+    'concurrent.futures',
+    'multiprocessing',
+    'http.server',
+    'socketserver'
+]
+
+
+arg_parser = argparse.ArgumentParser(
+    prog='startup.py',
+    description='Benchmark the startup time of giftoa.'
+)
+
+arg_parser.add_argument('-n', '--runs', type=int, default=20,
+                        help='The number of times to start giftoa, default is 20.')
+
+arg_parser.add_argument('--max-ms', dest='max_ms', type=float, default=None,
+                        help='Fail if a median startup time in milliseconds is greater than this.')
+
+arg_parser.add_argument('--build', dest='build_gif', default=None,
+                        help='Also time a build of this GIF which is found in the artifact cache.  The GIF is '
+                             'built once beforehand, using a temporary cache directory.')
+
+
+def time_runs(runs, giftoa_args, environment=None):
+    timings = []
+
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        subprocess.check_call([sys.executable, giftoa_path] + giftoa_args, stdout=subprocess.DEVNULL,
+                              env=environment)
+        timings.append((time.perf_counter() - start_time) * 1000)
+
+    return sorted(timings)
+
+
+def time_startup(runs):
+    return time_runs(runs, ['--version'])
+
+
+def time_cached_build(runs, gif_path):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        environment = dict(os.environ, GIFTOA_CACHE_DIR=os.path.join(temp_dir, 'cache'))
+        build_args = ['-i', gif_path, '-o', os.path.join(temp_dir, 'output'), '--cache']
+
+        # fills the artifact cache and the toolchain cache
+        subprocess.check_call([sys.executable, giftoa_path] + build_args, stdout=subprocess.DEVNULL,
+                              env=environment)
+
+        return time_runs(runs, build_args, environment)
+
+
+def report(name, runs, timings, max_ms):
+    median = timings[len(timings) // 2]
+
+    print('{name}, {runs} runs: min {min:.1f}ms, median {median:.1f}ms, max {max:.1f}ms'
+          .format(name=name, runs=runs, min=timings[0], median=median, max=timings[-1]))
+
+    if max_ms is not None and median > max_ms:
+        print('Median time of {name} is over the limit of {max_ms:.1f}ms.'.format(name=name, max_ms=max_ms))
+        return False
+
+    return True
+
+
+def imported_modules():
+    output = subprocess.run([sys.executable, '-X', 'importtime', giftoa_path, '--version'],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True).stderr.decode()
+
+    return {line.split('|')[-1].strip() for line in output.split('\n') if line.startswith('import time:')}
+
+
+def main():
+    args = arg_parser.parse_args()
+
+    failed = not report('giftoa --version', args.runs, time_startup(args.runs), args.max_ms)
+
+    if args.build_gif:
+        failed |= not report('cached build', args.runs, time_cached_build(args.runs, args.build_gif), args.max_ms)
+
+    eager_modules = [module for module in DEFERRED_MODULES if module in imported_modules()]
+
+    if eager_modules:
+        print('Deferred modules imported at startup: {modules}'.format(modules=', '.join(eager_modules)))
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -26,16 +26,16 @@ import sys
 import os
 import atexit
 import os.path
-import tempfile
 import subprocess
 import re
 import argparse
-import imghdr
-import urllib.request
 import urllib.parse
-import urllib.error
 import shutil
-import platform
+import collections
+import json
+
+# Modules which are only needed by some code paths, such as network access, image type
+# detection and the build service, are imported where they are used to keep startup fast.
 
 __author__ = 'Teriks'
 __copyright__ = 'Copyright (c) 2016 Teriks'
@@ -47,6 +47,73 @@ C_HEADERS = """
 #include <curses.h>
 #include <stdlib.h>
 #include <time.h>
+#include <unistd.h>
+#include <sys/select.h>
+
+"""
+
+# Color support for the ncurses player, written after the headers when jp2a's --colors
+# option is in use.  Frames are arrays of runs which share a single palette color.
+
+C_CURSES_COLOR_TYPES = """
+
+struct giftoa_run
+{
+    short color;
+    const char * text;
+};
+
+"""
+
+C_CURSES_COLOR_SUPPORT = C_CURSES_COLOR_TYPES + """
+
+#define GIFTOA_COLOR
+
+struct giftoa_frame
+{
+    const struct giftoa_run * runs;
+    int runcnt;
+};
+
+void giftoa_init_colors()
+{
+    if(!has_colors())
+    {
+        return;
+    }
+
+    start_color();
+
+    short background = use_default_colors() == OK ? -1 : COLOR_BLACK;
+
+    short i;
+    for(i = 0; i < 8; i++)
+    {
+        init_pair(i+1, i, background);
+    }
+}
+
+void giftoa_draw_runs(const struct giftoa_frame * frame)
+{
+    int i;
+    for(i = 0; i < frame->runcnt; i++)
+    {
+        short color = frame->runs[i].color;
+
+        if(color < 0)
+        {
+            attrset(A_NORMAL);
+        }
+        else
+        {
+            attrset(COLOR_PAIR((color & 7) + 1) | (color & 8 ? A_BOLD : A_NORMAL));
+        }
+
+        addstr(frame->runs[i].text);
+    }
+
+    attrset(A_NORMAL);
+}
 
 """
 
@@ -87,7 +154,95 @@ int _clock_gettime_monotonic(struct timespec* t) {
 
 """
 
-C_PROGRAM = """
+# Timing and input support shared by both players.  Players sleep in pselect() until the next
+# frame is due, a key is pressed or the terminal is resized.  When paused, or when every frame
+# is the same, there is no timeout and the player does not wake up until it gets input.
+
+C_PLAYER_SUPPORT = """
+
+#define GIFTOA_KEY_QUIT 27
+#define GIFTOA_KEY_PAUSE ' '
+#define GIFTOA_KEY_STEP '.'
+
+void timespec_add(struct timespec * t, const struct timespec * d)
+{
+    t->tv_sec += d->tv_sec;
+    t->tv_nsec += d->tv_nsec;
+
+    if(t->tv_nsec >= 1000000000L)
+    {
+        t->tv_sec += 1;
+        t->tv_nsec -= 1000000000L;
+    }
+}
+
+int timespec_before(const struct timespec * a, const struct timespec * b)
+{
+    return a->tv_sec < b->tv_sec || (a->tv_sec == b->tv_sec && a->tv_nsec < b->tv_nsec);
+}
+
+// Blocks SIGWINCH, waitMask receives the original signal mask which wait_for_input() passes
+// to pselect(), so SIGWINCH can only be delivered while waiting and always interrupts the wait.
+
+void block_resize_signal(sigset_t * waitMask)
+{
+    sigset_t resizeMask;
+
+    sigemptyset(&resizeMask);
+    sigaddset(&resizeMask, SIGWINCH);
+
+    sigprocmask(SIG_BLOCK, &resizeMask, waitMask);
+    sigdelset(waitMask, SIGWINCH);
+}
+
+// Wait for input on stdin, a signal, or the deadline, a NULL deadline waits without a timeout.
+// Returns 1 when stdin is readable.
+
+int wait_for_input(const struct timespec * deadline, const sigset_t * waitMask, int watchInput)
+{
+    struct timespec timeout;
+    struct timespec * timeoutPtr = NULL;
+
+    if(deadline != NULL)
+    {
+        struct timespec now;
+
+        _clock_gettime_monotonic(&now);
+
+        if(timespec_before(&now, deadline))
+        {
+            timeout.tv_sec = deadline->tv_sec - now.tv_sec;
+            timeout.tv_nsec = deadline->tv_nsec - now.tv_nsec;
+
+            if(timeout.tv_nsec < 0)
+            {
+                timeout.tv_sec -= 1;
+                timeout.tv_nsec += 1000000000L;
+            }
+        }
+        else
+        {
+            timeout.tv_sec = 0;
+            timeout.tv_nsec = 0;
+        }
+
+        timeoutPtr = &timeout;
+    }
+
+    fd_set inputFds;
+    FD_ZERO(&inputFds);
+
+    if(watchInput)
+    {
+        FD_SET(STDIN_FILENO, &inputFds);
+    }
+
+    return pselect(watchInput ? STDIN_FILENO + 1 : 0, &inputFds, NULL, NULL, timeoutPtr, waitMask) > 0;
+}
+
+"""
+
+C_PROGRAM = C_PLAYER_SUPPORT + """
 
 WINDOW * mainwin = 0;
 
@@ -122,51 +277,421 @@ int main(int argc, char *argv[])
 
     sigaction(SIGINT, &sigIntHandler, NULL);
 
+    // ncurses installs its own SIGWINCH handler, which makes getch() return KEY_RESIZE
+    sigset_t waitMask;
+    block_resize_signal(&waitMask);
 
     if ( (mainwin = initscr()) == NULL ) {
         fprintf(stderr, "Error initialising ncurses.\\n");
         exit(EXIT_FAILURE);
     }
-        
+
+#ifdef GIFTOA_COLOR
+    giftoa_init_colors();
+
+    const struct giftoa_frame frames[] = GIFTOA_FRAMES_INIT;
+    int framecnt = sizeof(frames) / sizeof(struct giftoa_frame);
+#define GIFTOA_FRAME_ID(f) (frames[f].runs)
+#else
     const char * frames[] = GIFTOA_FRAMES_INIT;
     int framecnt = sizeof(frames) / sizeof(const char*);
+#define GIFTOA_FRAME_ID(f) (frames[f])
+#endif
 
     curs_set(0);
 
+    // keys are read as they are typed, otherwise stdin only becomes readable after a newline
+    cbreak();
+    noecho();
     nodelay(mainwin, 1);
 
-    struct timespec startTime;
-    struct timespec endTime;
-    struct timespec computedDelay;
+    // identical frames share a variable, an animation
+    // where every frame is the same is never redrawn
+    int isStatic = 1;
+    int i;
+    for(i = 1; i < framecnt; i++)
+    {
+        if(GIFTOA_FRAME_ID(i) != GIFTOA_FRAME_ID(0))
+        {
+            isStatic = 0;
+            break;
+        }
+    }
 
     int frame = 0;
+    int drawnFrame = -1;
+    int paused = 0;
+    int watchInput = 1;
+
+    struct timespec now;
+    struct timespec deadline;
+
+    _clock_gettime_monotonic(&deadline);
+    timespec_add(&deadline, &frameDelay);
 
     while(true) 
     {
-        _clock_gettime_monotonic(&startTime);
+        if(drawnFrame == -1 || GIFTOA_FRAME_ID(frame) != GIFTOA_FRAME_ID(drawnFrame))
+        {
+            if(drawnFrame == -1)
+            {
+                clear();
+            }
+            else
+            {
+                erase();
+            }
+#ifdef GIFTOA_COLOR
+            move(0, 0);
+            giftoa_draw_runs(&frames[frame]);
+#else
+            mvaddstr(0, 0, frames[frame]);
+#endif
+            refresh();
+
+            drawnFrame = frame;
+        }
+
+        int input = wait_for_input(paused || isStatic ? NULL : &deadline, &waitMask, watchInput);
+
+        int key;
+        int keycnt = 0;
+        int quit = 0;
+
+        while(!quit && (key = getch()) != ERR)
+        {
+            keycnt++;
+
+            switch(key)
+            {
+            case GIFTOA_KEY_QUIT:
+                quit = 1;
+                break;
+            case GIFTOA_KEY_PAUSE:
+                paused = !paused;
+                _clock_gettime_monotonic(&deadline);
+                timespec_add(&deadline, &frameDelay);
+                break;
+            case GIFTOA_KEY_STEP:
+                if(paused) frame = frame == framecnt-1 ? 0 : frame+1;
+                break;
+            case KEY_RESIZE:
+                drawnFrame = -1;
+                break;
+            }
+        }
 
-        if(getch() == 27)
+        if(quit)
         {
             break;
         }
 
-        clear();
-        mvaddstr(0, 0, frames[frame]);
-        refresh();
-        
-        frame = frame == framecnt-1 ? 0 : frame+1;
+        if(input && keycnt == 0)
+        {
+            // stdin is readable but there is no key, it has been closed
+            watchInput = 0;
+        }
+
+        if(paused || isStatic)
+        {
+            continue;
+        }
+
+        _clock_gettime_monotonic(&now);
+
+        if(!timespec_before(&now, &deadline))
+        {
+            frame = frame == framecnt-1 ? 0 : frame+1;
+
+            timespec_add(&deadline, &frameDelay);
+
+            // when playback falls behind, wait a full frame delay rather than catching up
+            if(timespec_before(&deadline, &now))
+            {
+                deadline = now;
+                timespec_add(&deadline, &frameDelay);
+            }
+        }
+    }
+
+    cleanup();
+
+    return EXIT_SUCCESS;
+}
+"""
+
+# Headers for the --raw-ansi player, which does not link against ncurses.
+
+C_RAW_HEADERS = """
+#include <signal.h>
+#include <stdlib.h>
+#include <stdio.h>
+#include <errno.h>
+#include <time.h>
+#include <unistd.h>
+#include <termios.h>
+#include <sys/select.h>
+
+"""
+
+# The --raw-ansi player.  Every frame is generated as a complete byte stream
+# (cursor home, frame text, erase sequences) and emitted with a single write().
+# The alternate screen buffer is used so the users terminal is restored on exit.
+
+C_RAW_PROGRAM = C_PLAYER_SUPPORT + """
+
+#define GIFTOA_ENTER_SCREEN "\\033[?1049h\\033[?25l\\033[?7l\\033[2J"
+#define GIFTOA_LEAVE_SCREEN "\\033[?7h\\033[?25h\\033[?1049l"
+#define GIFTOA_CLEAR_SCREEN "\\033[2J"
+
+struct termios origTermios;
+struct termios rawTermios;
+int termiosSaved = 0;
+int screenEntered = 0;
+
+volatile sig_atomic_t resized = 0;
+
+void suspend_handler(int s);
+
+void write_all(const char * buf, size_t len)
+{
+    while(len > 0)
+    {
+        ssize_t written = write(STDOUT_FILENO, buf, len);
+        if(written < 0)
+        {
+            if(errno == EINTR) continue;
+            return;
+        }
+        buf += written;
+        len -= (size_t)written;
+    }
+}
+
+void cleanup()
+{
+    if(screenEntered)
+    {
+        write_all(GIFTOA_LEAVE_SCREEN, sizeof(GIFTOA_LEAVE_SCREEN)-1);
+        screenEntered = 0;
+    }
+
+    if(termiosSaved)
+    {
+        tcsetattr(STDIN_FILENO, TCSANOW, &origTermios);
+        termiosSaved = 0;
+    }
+}
+
+void signal_handler(int s)
+{
+    cleanup();
+    _exit(EXIT_SUCCESS);
+}
+
+void resize_handler(int s)
+{
+    resized = 1;
+}
+
+void set_signal_handler(int s, void (*handler)(int))
+{
+    struct sigaction action;
+
+    action.sa_handler = handler;
+    sigemptyset(&action.sa_mask);
+    action.sa_flags = 0;
+
+    sigaction(s, &action, NULL);
+}
+
+// Ctrl-Z restores the terminal before the player is stopped, SIGTSTP is blocked while
+// its handler runs, so the default action stops the player once the handler returns.
+
+void suspend_handler(int s)
+{
+    int savedErrno = errno;
+
+    if(screenEntered)
+    {
+        write_all(GIFTOA_LEAVE_SCREEN, sizeof(GIFTOA_LEAVE_SCREEN)-1);
+        screenEntered = 0;
+    }
+
+    if(termiosSaved)
+    {
+        tcsetattr(STDIN_FILENO, TCSANOW, &origTermios);
+    }
+
+    set_signal_handler(SIGTSTP, SIG_DFL);
+    raise(SIGTSTP);
+
+    errno = savedErrno;
+}
+
+void continue_handler(int s)
+{
+    int savedErrno = errno;
+
+    if(!screenEntered)
+    {
+        if(termiosSaved)
+        {
+            tcsetattr(STDIN_FILENO, TCSANOW, &rawTermios);
+        }
+
+        write_all(GIFTOA_ENTER_SCREEN, sizeof(GIFTOA_ENTER_SCREEN)-1);
+        screenEntered = 1;
+
+        // the screen is redrawn the same as after a resize, which may also have happened
+        resized = 1;
+    }
+
+    set_signal_handler(SIGTSTP, suspend_handler);
+
+    errno = savedErrno;
+}
+
+
+int main(int argc, char *argv[])
+{
+    struct timespec frameDelay;
+
+    GIFTOA_FRAMEDELAY_INIT(frameDelay)
+
+    set_signal_handler(SIGINT, signal_handler);
+    set_signal_handler(SIGTERM, signal_handler);
+    set_signal_handler(SIGHUP, signal_handler);
+
+    sigset_t waitMask;
+    block_resize_signal(&waitMask);
+
+    set_signal_handler(SIGWINCH, resize_handler);
+
+    if(tcgetattr(STDIN_FILENO, &origTermios) == 0)
+    {
+        rawTermios = origTermios;
+
+        rawTermios.c_lflag &= ~(ICANON | ECHO);
+        rawTermios.c_cc[VMIN] = 0;
+        rawTermios.c_cc[VTIME] = 0;
+
+        if(tcsetattr(STDIN_FILENO, TCSANOW, &rawTermios) == 0)
+        {
+            termiosSaved = 1;
+        }
+    }
+
+    const char * frames[] = GIFTOA_FRAMES_INIT;
+    const size_t framelens[] = GIFTOA_FRAME_LENGTHS_INIT;
+    int framecnt = sizeof(frames) / sizeof(const char*);
+
+    write_all(GIFTOA_ENTER_SCREEN, sizeof(GIFTOA_ENTER_SCREEN)-1);
+    screenEntered = 1;
+
+    set_signal_handler(SIGTSTP, suspend_handler);
+    set_signal_handler(SIGCONT, continue_handler);
+
+    // identical frames share a variable, an animation
+    // where every frame is the same is never redrawn
+    int isStatic = 1;
+    int i;
+    for(i = 1; i < framecnt; i++)
+    {
+        if(frames[i] != frames[0])
+        {
+            isStatic = 0;
+            break;
+        }
+    }
+
+    int frame = 0;
+    int drawnFrame = -1;
+    int paused = 0;
+    int watchInput = 1;
+
+    struct timespec now;
+    struct timespec deadline;
+
+    _clock_gettime_monotonic(&deadline);
+    timespec_add(&deadline, &frameDelay);
+
+    char keys[64];
+
+    while(1)
+    {
+        if(drawnFrame == -1 || frames[frame] != frames[drawnFrame])
+        {
+            write_all(frames[frame], framelens[frame]);
+            drawnFrame = frame;
+        }
+
+        int input = wait_for_input(paused || isStatic ? NULL : &deadline, &waitMask, watchInput);
+
+        if(resized)
+        {
+            resized = 0;
+
+            write_all(GIFTOA_CLEAR_SCREEN, sizeof(GIFTOA_CLEAR_SCREEN)-1);
+            drawnFrame = -1;
+        }
 
-        _clock_gettime_monotonic(&endTime);
+        if(input)
+        {
+            ssize_t keycnt = read(STDIN_FILENO, keys, sizeof(keys));
+
+            if(keycnt == 0)
+            {
+                // stdin is readable but there is no key, it has been closed
+                watchInput = 0;
+            }
+
+            int quit = 0;
+
+            for(i = 0; i < keycnt && !quit; i++)
+            {
+                switch(keys[i])
+                {
+                case GIFTOA_KEY_QUIT:
+                    quit = 1;
+                    break;
+                case GIFTOA_KEY_PAUSE:
+                    paused = !paused;
+                    _clock_gettime_monotonic(&deadline);
+                    timespec_add(&deadline, &frameDelay);
+                    break;
+                case GIFTOA_KEY_STEP:
+                    if(paused) frame = frame == framecnt-1 ? 0 : frame+1;
+                    break;
+                }
+            }
+
+            if(quit)
+            {
+                break;
+            }
+        }
+
+        if(paused || isStatic)
+        {
+            continue;
+        }
 
-        time_t tv_sec = frameDelay.tv_sec - (endTime.tv_sec - startTime.tv_sec);
-        long tv_nsec = frameDelay.tv_nsec - (endTime.tv_nsec - startTime.tv_nsec);
+        _clock_gettime_monotonic(&now);
 
-        // hope that time_t is signed?
+        if(!timespec_before(&now, &deadline))
+        {
+            frame = frame == framecnt-1 ? 0 : frame+1;
 
-        computedDelay.tv_sec = tv_sec < 0 ? 0 : tv_sec;
-        computedDelay.tv_nsec = tv_nsec < 0 ? 0 : tv_nsec;
+            timespec_add(&deadline, &frameDelay);
 
-        nanosleep(&computedDelay, NULL);
+            // when playback falls behind, wait a full frame delay rather than catching up
+            if(timespec_before(&deadline, &now))
+            {
+                deadline = now;
+                timespec_add(&deadline, &frameDelay);
+            }
+        }
     }
 
     cleanup();
@@ -175,6 +700,35 @@ int main(int argc, char *argv[])
 }
 """
 
+# Escape sequences used to build --raw-ansi frames.  Each frame starts at the home
+# position, erases the remainder of every line it writes (lines from jp2a are right
+# stripped), and erases everything below its last line.
+
+ANSI_CURSOR_HOME = '\x1b[H'
+ANSI_ERASE_LINE = '\x1b[K'
+ANSI_ERASE_BELOW = '\x1b[J'
+
+# Used by --live playback, the same as GIFTOA_ENTER_SCREEN / GIFTOA_LEAVE_SCREEN in C_RAW_PROGRAM.
+
+ANSI_ENTER_SCREEN = '\x1b[?1049h\x1b[?25l\x1b[?7l\x1b[2J'
+ANSI_LEAVE_SCREEN = '\x1b[?7h\x1b[?25h\x1b[?1049l'
+
+
+# Colors in frames rendered with jp2a's --colors option are quantized to the 16 color ANSI
+# palette, index 0-7 being the normal colors and 8-15 their bright / bold variants.  -1
+# is the terminals default color.  Reference RGB values are those of xterm.
+
+ANSI_PALETTE_RGB = [
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0),
+    (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0),
+    (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255)
+]
+
+ANSI_DEFAULT_COLOR = -1
+
+ANSI_SGR_RE = re.compile('\x1b\\[([0-9;]*)m')
+
 
 def is_url(path):
     return urllib.parse.urlparse(path).scheme != ""
@@ -187,12 +741,19 @@ def is_url(path):
 
 class GCNamedTempFile:
     def __init__(self, mode='w+b'):
+        import tempfile
+
         self.file = tempfile.NamedTemporaryFile(mode=mode, delete=False)
         atexit.register(self.on_exit)
 
     def on_exit(self):
         os.unlink(self.file.name)
 
+    def delete(self):
+        self.file.close()
+        atexit.unregister(self.on_exit)
+        self.on_exit()
+
 
 # The temporary file created by a gif download is deleted when the program exits.
 # The object needs to be global so it does not get eaten by the garbage collector.
@@ -203,6 +764,9 @@ downloaded_gif_temp_file = None
 # Download a gif to a temporary file and return the full path to it on disk.
 
 def download_gif(parser, path):
+    import urllib.request
+    import urllib.error
+
     global downloaded_gif_temp_file
 
     downloaded_gif_temp_file = GCNamedTempFile()
@@ -220,6 +784,8 @@ def download_gif(parser, path):
 
 
 def is_valid_input(parser, path):
+    import imghdr
+
     if os.path.isfile(path):
         if imghdr.what(path) != 'gif':
             parser.error('"{path}" is not a GIF file.'.format(path=path))
@@ -286,27 +852,85 @@ def is_valid_framesleep_nanoseconds(parser, sleep):
     return i_value
 
 
-arg_parser = argparse.ArgumentParser(
-    prog='giftoa',
+def is_valid_frame_manifest(parser, path):
+    if not os.path.isfile(path):
+        parser.error('The frame manifest "{path}" is not a file.'.format(path=path))
+    return path
 
-    description=
-    'Compile a GIF into an native executable that plays the GIF in ASCII on the console using libncurses.  '
-    'See: https://github.com/Teriks/giftoa',
 
-    epilog=
-    'All arguments following the arguments listed above will be '
-    'passed as options to jp2a.  ANSI colors are not supported...  '
-    'Also note that this program requires: gcc, libncurses-dev, jp2a and ImageMagick.'
-)
+def is_valid_ingest_workers(parser, workers):
+    err_prefix = 'argument --ingest-workers: '
 
-arg_parser.add_argument('-v', '--version', action='version',
-                        version='%(prog)s {version}'.format(version=__version__))
+    try:
+        i_value = int(workers)
+    except ValueError:
+        parser.error(err_prefix + 'Value must be a whole / integral number.')
+        # parser.error calls exit(2), this is to silence pre-commit code analysis
+        return None
 
-arg_parser.add_argument('-i', '--input',
-                        help='A GIF file, GIF URL, or a directory full of jp2a compatible image frames (jpegs).  '
-                             'If you provide a directory the jpeg images are sorted by name in natural order, '
-                             'you should include a frame number at the beginning or end of the file name accordingly '
-                             'to keep the frames sorted correctly.  Specifying the output file name with --output is '
+    if i_value < 1:
+        parser.error(err_prefix + 'Value cannot be less than 1.')
+    return i_value
+
+
+def is_valid_live_buffer(parser, frames):
+    err_prefix = 'argument --live-buffer: '
+
+    try:
+        i_value = int(frames)
+    except ValueError:
+        parser.error(err_prefix + 'Value must be a whole / integral number.')
+        # parser.error calls exit(2), this is to silence pre-commit code analysis
+        return None
+
+    if i_value < 1:
+        parser.error(err_prefix + 'Value cannot be less than 1.')
+    return i_value
+
+
+SIZE_SUFFIXES = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def is_valid_size(parser, option, size):
+    err_prefix = 'argument {option}: '.format(option=option)
+
+    match = re.match(r'^\s*([0-9]+)\s*([KMGT]?)i?B?\s*$', size, re.IGNORECASE)
+
+    if not match:
+        parser.error(err_prefix + 'Value must be a whole number of bytes, optionally followed by K, M, G or T.')
+        # parser.error calls exit(2), this is to silence pre-commit code analysis
+        return None
+
+    i_value = int(match.group(1)) * SIZE_SUFFIXES[match.group(2).upper()]
+
+    if i_value < 1:
+        parser.error(err_prefix + 'Value cannot be less than 1.')
+    return i_value
+
+
+arg_parser = argparse.ArgumentParser(
+    prog='giftoa',
+
+    description=
+    'Compile a GIF into an native executable that plays the GIF in ASCII on the console using libncurses.  '
+    'See: https://github.com/Teriks/giftoa',
+
+    epilog=
+    'All arguments following the arguments listed above will be '
+    'passed as options to jp2a.  ANSI colors produced by jp2a --colors are supported, and are quantized '
+    'to a 16 color palette.  '
+    'Also note that this program requires: gcc, libncurses-dev, jp2a and ImageMagick.  '
+    'Run "giftoa serve -h" for help with running giftoa as a local build service.'
+)
+
+arg_parser.add_argument('-v', '--version', action='version',
+                        version='%(prog)s {version}'.format(version=__version__))
+
+arg_parser.add_argument('-i', '--input',
+                        help='A GIF file, GIF URL, or a directory full of jp2a compatible image frames (jpegs).  '
+                             'If you provide a directory the jpeg images are sorted by name in natural order, '
+                             'you should include a frame number at the beginning or end of the file name accordingly '
+                             'to keep the frames sorted correctly.  Specifying the output file name with --output is '
                              'required when a directory or URL is passed to --input.',
 
                         dest='input_path', default=None,
@@ -316,6 +940,30 @@ arg_parser.add_argument('--stdin-frames', dest='stdin_frames', action='store_tru
                         help='Accept input frames from stdin as '
                              'a newline separated list of jpeg file paths.')
 
+arg_parser.add_argument('--live', dest='live', action='store_true',
+                        help='Used with --stdin-frames, display frames on the terminal as soon as their paths are '
+                             'read and rendered.  If -o/--output is given, the stream is also compiled into an '
+                             'executable when stdin is closed or playback is interrupted with Ctrl-C.')
+
+arg_parser.add_argument('--live-buffer', dest='live_buffer', default=16,
+                        type=lambda frames: is_valid_live_buffer(arg_parser, frames),
+                        help='The number of rendered frames --live will buffer ahead of playback, default is 16.  '
+                             'Reading from stdin stops while the buffer is full.')
+
+arg_parser.add_argument('--frame-manifest', dest='frame_manifest', default=None,
+                        type=lambda path: is_valid_frame_manifest(arg_parser, path),
+                        help='A file containing a newline separated list of jpeg file paths to use as frames, in '
+                             'order.  Relative paths are relative to the directory containing the manifest.  '
+                             'The files are trusted to be JPEGs and are not inspected, which avoids reading '
+                             'every file header up front for very large frame sets.  Specifying the output '
+                             'file name with --output is required.')
+
+arg_parser.add_argument('--ingest-workers', dest='ingest_workers', default=8,
+                        type=lambda workers: is_valid_ingest_workers(arg_parser, workers),
+                        help='The number of threads used to check the file type of frames from a directory '
+                             'or from --stdin-frames, concurrently with rendering.  The default is 8.  '
+                             'Not used with --live, which checks each frame as it arrives.')
+
 arg_parser.add_argument('-o', '--output',
 
                         help='The name of the output executable.  '
@@ -354,28 +1002,73 @@ arg_parser.add_argument('-fsn', '--framesleep-nanoseconds', default=None, dest='
 arg_parser.add_argument('-cc', '--compiler', type=str, default='cc',
                         help='The command used to invoke the C compiler, default is "cc".')
 
+arg_parser.add_argument('--max-temp-disk', dest='max_temp_disk', default=None,
+                        type=lambda size: is_valid_size(arg_parser, '--max-temp-disk', size),
+                        help='The temporary disk space which decoded GIF frames may use, for example 500M.  '
+                             'The GIF is decoded in chunks of frames which fit in this space, and each frame is '
+                             'deleted as soon as it is rendered.  ImageMagick\'s disk cache is also limited '
+                             'to this size.  Requires ImageMagick\'s "identify" command.')
+
+arg_parser.add_argument('--max-memory', dest='max_memory', default=None,
+                        type=lambda size: is_valid_size(arg_parser, '--max-memory', size),
+                        help='The memory which ImageMagick and the C compiler should stay within, for example 1G.  '
+                             'Frames are split across several C source files which are compiled one at a time, '
+                             'while frames are still being rendered, and then linked together.')
+
+arg_parser.add_argument('--cache', dest='cache', action='store_true',
+                        help='Use the build cache.  When the input, jp2a options, timing options, compiler and '
+                             'giftoa version match a previous build, the cached executable is copied to the '
+                             'output file instead of building it again.  Builds reading --stdin-frames are '
+                             'not cached.')
+
+arg_parser.add_argument('--cache-max-size', dest='cache_max_size', default='1G',
+                        type=lambda size: is_valid_size(arg_parser, '--cache-max-size', size),
+                        help='The size the build cache is kept under by removing the least recently used '
+                             'executables, default is 1G.')
+
+arg_parser.add_argument('--cache-stats', dest='cache_stats', action='store_true',
+                        help='Print statistics about the build cache and exit.')
+
+arg_parser.add_argument('--raw-ansi', dest='raw_ansi', action='store_true',
+                        help='Build a player that writes precomputed ANSI escape sequences directly to the '
+                             'terminal instead of using ncurses.  Each frame is emitted with a single write, '
+                             'and the resulting executable does not link against libncurses.')
+
 
 def natural_sort_key(s, _nsre=re.compile('([0-9]+)')):
     return [int(text) if text.isdigit() else text.lower()
             for text in re.split(_nsre, s)]
 
 
-def write_clock_gettime_impl(file):
+def get_clock_gettime_impl():
+    import platform
+
     mac_ver = platform.mac_ver()[0].split('.')
 
     if mac_ver == ['']:
-        file.write(GETTIME_DEFAULT_IMPL)
+        return 'default'
     elif [int(x) for x in mac_ver[:2]] < [10, 12]:
         # Need to emulate if MacOS < 10.12
+        return 'macos'
+    return None
+
+
+def write_clock_gettime_impl(file, clock_impl):
+    if clock_impl == 'default':
+        file.write(GETTIME_DEFAULT_IMPL)
+    elif clock_impl == 'macos':
         file.write(GETTIME_MACOS_IMPL)
 
 
-def write_jp2a_cvar_into_file(environment, file, var_name, image_filename, jp2a_args):
+def c_string_escape(text):
+    return text.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def render_jp2a_frame(environment, image_filename, jp2a_args):
     jp2a = ['jp2a', image_filename]
     jp2a.extend(jp2a_args)
 
     success = True
-    first_line = True
 
     with subprocess.Popen(jp2a, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=environment) as p:
         data = p.communicate()
@@ -388,24 +1081,535 @@ def write_jp2a_cvar_into_file(environment, file, var_name, image_filename, jp2a_
                 print(line, file=sys.stderr)
                 success = False
 
-        if not success:
+    if not success:
+        return None
+
+    return [line.rstrip() for line in data_stdout if line != '']
+
+
+def quantize_rgb(red, green, blue):
+    return min(range(len(ANSI_PALETTE_RGB)),
+               key=lambda i: (ANSI_PALETTE_RGB[i][0] - red) ** 2 +
+                             (ANSI_PALETTE_RGB[i][1] - green) ** 2 +
+                             (ANSI_PALETTE_RGB[i][2] - blue) ** 2)
+
+
+def quantize_xterm256(index):
+    if index < 16:
+        return index
+
+    if index < 232:
+        index -= 16
+        levels = [0, 95, 135, 175, 215, 255]
+        return quantize_rgb(levels[index // 36], levels[(index // 6) % 6], levels[index % 6])
+
+    gray = 8 + (index - 232) * 10
+    return quantize_rgb(gray, gray, gray)
+
+
+def apply_sgr_params(params, color, bold):
+    codes = [int(code) if code else 0 for code in params.split(';')]
+
+    i = 0
+    while i < len(codes):
+        code = codes[i]
+        if code == 0:
+            color, bold = ANSI_DEFAULT_COLOR, False
+        elif code == 1:
+            bold = True
+        elif code == 22:
+            bold = False
+        elif 30 <= code <= 37:
+            color = code - 30
+        elif 90 <= code <= 97:
+            color = code - 90 + 8
+        elif code == 39:
+            color = ANSI_DEFAULT_COLOR
+        elif code in (38, 48) and i + 1 < len(codes):
+            # extended colors, backgrounds are skipped over but not used
+            if codes[i + 1] == 5 and i + 2 < len(codes):
+                if code == 38:
+                    color = quantize_xterm256(codes[i + 2])
+                i += 2
+            elif codes[i + 1] == 2 and i + 4 < len(codes):
+                if code == 38:
+                    color = quantize_rgb(*codes[i + 2:i + 5])
+                i += 4
+        i += 1
+
+    return color, bold
+
+
+# Parse jp2a --colors output into a list of [color, text] runs.
+#
+# Whitespace takes on the color of the run it follows, since foreground color does not
+# affect it, so that neighboring cells of similar color share a single run.
+
+def parse_color_runs(lines):
+    runs = []
+    color, bold = ANSI_DEFAULT_COLOR, False
+
+    def append(run_color, text):
+        if not text:
+            return
+        if runs and (runs[-1][0] == run_color or text.isspace()):
+            runs[-1][1] += text
+        else:
+            runs.append([run_color, text])
+
+    for line_index, line in enumerate(lines):
+        line_runs = []
+        pieces = ANSI_SGR_RE.split(line)
+
+        for piece_index, piece in enumerate(pieces):
+            if piece_index % 2:
+                color, bold = apply_sgr_params(piece, color, bold)
+            elif piece:
+                palette_color = color | 8 if bold and 0 <= color < 8 else color
+                line_runs.append((palette_color, piece))
+
+        # right strip the line, ignoring the escape sequences surrounding the text
+        while line_runs and line_runs[-1][1].rstrip() == '':
+            line_runs.pop()
+        if line_runs:
+            line_runs[-1] = (line_runs[-1][0], line_runs[-1][1].rstrip())
+
+        if line_index != 0:
+            append(ANSI_DEFAULT_COLOR, '\n')
+
+        for run_color, text in line_runs:
+            append(run_color, text)
+
+    return runs
+
+
+def ansi_sgr_for_color(color, current_color=ANSI_DEFAULT_COLOR):
+    if color == ANSI_DEFAULT_COLOR:
+        return '\x1b[0m'
+
+    if current_color != ANSI_DEFAULT_COLOR and (current_color & 8) == (color & 8):
+        # only the foreground color differs
+        return '\x1b[3{color}m'.format(color=color & 7)
+
+    return '\x1b[{bold};3{color}m'.format(bold=1 if color & 8 else 22, color=color & 7)
+
+
+# Build the complete escape sequence stream which draws a frame given as [color, text] runs.
+
+def build_ansi_frame(runs):
+    parts = [ANSI_CURSOR_HOME]
+
+    current_color = ANSI_DEFAULT_COLOR
+
+    for color, text in runs:
+        if color != current_color:
+            parts.append(ansi_sgr_for_color(color, current_color))
+            current_color = color
+
+        parts.append(text.replace('\n', ANSI_ERASE_LINE + '\n'))
+
+    if current_color != ANSI_DEFAULT_COLOR:
+        parts.append(ansi_sgr_for_color(ANSI_DEFAULT_COLOR))
+
+    parts.append(ANSI_ERASE_BELOW)
+
+    return ''.join(parts)
+
+
+def get_frame_runs(lines, colors):
+    if colors:
+        return parse_color_runs(lines)
+    return [[ANSI_DEFAULT_COLOR, '\n'.join(lines)]]
+
+
+# Frame variables are not static, so that they can be defined in a separate translation
+# unit from the player when a build is split up to stay within --max-memory.
+# The write functions return the size used by GIFTOA_FRAMES_INIT, see get_frames_init_macro_define.
+
+def write_frame_cvar_into_file(file, var_name, lines):
+    file.write('const char* ' + var_name + '= "\\\n')
+
+    for line in lines:
+        file.write(c_string_escape(line) + '\\n\\\n')
+
+    file.write('";\n\n')
+
+    return None
+
+
+def write_color_frame_cvar_into_file(file, var_name, runs):
+    file.write('const struct giftoa_run ' + var_name + '[] = {\n')
+
+    for color, text in runs:
+        file.write('{' + str(color) + ', "' + c_string_escape(text).replace('\n', '\\n') + '"},\n')
+
+    file.write('};\n\n')
+
+    return len(runs)
+
+
+def write_raw_frame_cvar_into_file(file, var_name, runs):
+    frame = build_ansi_frame(runs)
+
+    # octal escapes are used for ESC, a hex escape would consume any hex digits which follow it
+    escaped_frame = c_string_escape(frame).replace('\x1b', '\\033').replace('\n', '\\n\\\n')
+
+    file.write('const char ' + var_name + '[] = "\\\n' + escaped_frame + '";\n\n')
+
+    return len(frame.encode('utf-8'))
+
+
+def write_frame_lines_cvar_into_file(file, var_name, lines, raw_ansi=False, colors=False):
+    if raw_ansi:
+        return write_raw_frame_cvar_into_file(file, var_name, get_frame_runs(lines, colors))
+    elif colors:
+        return write_color_frame_cvar_into_file(file, var_name, get_frame_runs(lines, colors))
+    else:
+        return write_frame_cvar_into_file(file, var_name, lines)
+
+
+def get_frame_cvar_extern_declaration(var_name, raw_ansi=False, colors=False):
+    if raw_ansi:
+        return 'extern const char ' + var_name + '[];\n'
+    elif colors:
+        return 'extern const struct giftoa_run ' + var_name + '[];\n'
+    else:
+        return 'extern const char* ' + var_name + ';\n'
+
+
+# Get the GIFTOA_FRAMES_INIT (and for --raw-ansi GIFTOA_FRAME_LENGTHS_INIT) defines
+# from a list of (var_name, size) tuples returned by write_frame_lines_cvar_into_file.
+
+def get_frames_init_macro_define(frame_cvars, raw_ansi=False, colors=False):
+    if raw_ansi:
+        return '#define GIFTOA_FRAMES_INIT {' + ','.join(name for name, _ in frame_cvars) + '}\n' \
+               '#define GIFTOA_FRAME_LENGTHS_INIT {' + ','.join(str(size) for _, size in frame_cvars) + '}\n'
+    elif colors:
+        return '#define GIFTOA_FRAMES_INIT {' + \
+               ','.join('{' + name + ', ' + str(size) + '}' for name, size in frame_cvars) + '}\n'
+    else:
+        return '#define GIFTOA_FRAMES_INIT {' + ','.join(name for name, _ in frame_cvars) + '}\n'
+
+
+# Get (frame_count, width, height) for a GIF using ImageMagick's identify,
+# or None if it could not be identified.
+
+def get_gif_info(input_path):
+    try:
+        output = subprocess.check_output(['identify', '-ping', '-format', '%n %W %H\\n', input_path],
+                                         stderr=subprocess.DEVNULL)
+        frame_count, width, height = (int(value) for value in output.decode().split('\n')[0].split())
+        return frame_count, width, height
+    except (subprocess.CalledProcessError, OSError, ValueError):
+        return None
+
+
+# Decode a GIF into JPEG frames in temp_dir and yield their paths in order.
+#
+# When chunk_size and the GIF's frame_count are given, only chunk_size frames are decoded
+# at a time, and the next chunk is not decoded until the frames before it have been consumed.
+# A yielded frame is deleted as soon as the consumer asks for the next one.
+
+def yield_gif_frame_paths(input_path, temp_dir, convert_limits, frame_count=None, chunk_size=None):
+    if frame_count is None or chunk_size is None:
+        chunks = [None]
+    else:
+        chunks = [(start, min(start + chunk_size, frame_count) - 1) for start in range(0, frame_count, chunk_size)]
+
+    for chunk in chunks:
+        convert = ['convert'] + convert_limits + ['-background', 'none', input_path, '-coalesce']
+
+        if chunk is not None:
+            # every chunk is coalesced from the start of the GIF, since frames depend on those before them
+            first, last = chunk
+            if last + 1 < frame_count:
+                convert += ['-delete', '{first}--1'.format(first=last + 1)]
+            if first > 0:
+                convert += ['-delete', '0-{last}'.format(last=first - 1)]
+            convert += ['-scene', str(first)]
+
+        frames_dir = os.path.join(temp_dir, 'frames')
+        os.makedirs(frames_dir, exist_ok=True)
+
+        # convert prints its own error, which is likely to be a -limit being exceeded
+        if subprocess.call(convert + ['-bordercolor', 'none', '-frame', '0', os.path.join(frames_dir, '%d.jpg')]):
+            arg_parser.error('Failed decoding frames from GIF "{file}" with ImageMagick\'s convert.'
+                             .format(file=input_path))
+
+        for path in sorted(os.listdir(frames_dir), key=natural_sort_key):
+            path = os.path.join(frames_dir, path)
+            yield path
+            os.unlink(path)
+
+
+# Writes frame variables into a series of C source files for --max-memory builds, so that
+# no single compiler process has to hold every frame in memory.
+#
+# A file is started whenever the current one reaches max_bytes, and the finished file is
+# compiled into an object file in the background while frames are written into the next.
+# Only one compiler process runs at a time.
+
+class FrameSourceFiles:
+    def __init__(self, temp_dir, compiler, max_bytes, raw_ansi=False, colors=False):
+        self.temp_dir = temp_dir
+        self.compiler = compiler
+        self.max_bytes = max_bytes
+        self.header = C_CURSES_COLOR_TYPES if colors and not raw_ansi else ''
+
+        self.object_files = []
+        self.compiler_output = open(os.path.join(temp_dir, 'frames_compiler_output.txt'), 'w+')
+        self.file = None
+        self.process = None
+        self.process_source = None
+        self.return_code = 0
+
+    def get_file(self):
+        if self.file is None:
+            path = os.path.join(self.temp_dir, 'frames_{index}.c'.format(index=len(self.object_files)))
+            self.file = open(path, 'w', encoding='utf-8')
+            self.file.write(self.header)
+        return self.file
+
+    def frame_written(self):
+        if self.file.tell() >= self.max_bytes:
+            self.finish_file()
+
+    def finish_file(self):
+        if self.file is None:
+            return
+
+        self.file.close()
+
+        self.wait()
+
+        object_file = os.path.splitext(self.file.name)[0] + '.o'
+        self.object_files.append(object_file)
+
+        self.process_source = self.file.name
+        # the compiler runs in its own session so that Ctrl-C, which ends a --live
+        # stream, does not also kill the compiler while it is in the background
+        self.process = subprocess.Popen([self.compiler, '-c', self.file.name, '-o', object_file],
+                                        stdout=self.compiler_output, stderr=subprocess.STDOUT,
+                                        start_new_session=True)
+        self.file = None
+
+    def wait(self):
+        if self.process is None:
+            return self.return_code
+
+        return_code = self.process.wait()
+        self.process = None
+
+        # the source is no longer needed once it is compiled
+        os.unlink(self.process_source)
+
+        if return_code and not self.return_code:
+            self.return_code = return_code
+
+        return self.return_code
+
+    # Compile any remaining frames and wait for the compiler, returns the compiler's
+    # exit code, its output is copied to stderr on failure.
+    def close(self):
+        self.finish_file()
+
+        return_code = self.wait()
+
+        if return_code:
+            self.compiler_output.seek(0)
+            shutil.copyfileobj(self.compiler_output, sys.stderr)
+            sys.stderr.flush()
+
+        self.compiler_output.close()
+
+        return return_code
+
+
+# A ccache style store of compiled executables, keyed by a hash of everything which
+# affects a build (see get_build_cache_key).
+#
+# Entries are evicted least recently used first once the store is larger than max_size,
+# an entries modification time is updated whenever it is used.
+
+class ArtifactCache:
+    def __init__(self, cache_dir, max_size):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.stats_file = os.path.join(cache_dir, 'stats.json')
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def entries(self):
+        entries = []
+
+        try:
+            subdirs = [entry.path for entry in os.scandir(self.cache_dir) if entry.is_dir()]
+        except OSError:
+            return entries
+
+        for subdir in subdirs:
+            for entry in os.scandir(subdir):
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        return entries
+
+    def read_stats(self):
+        try:
+            with open(self.stats_file) as stats_file:
+                return json.load(stats_file)
+        except (OSError, ValueError):
+            return {}
+
+    def count(self, name):
+        # counts are best effort, concurrent builds may lose updates
+        stats = self.read_stats()
+        stats[name] = stats.get(name, 0) + 1
+
+        temp_stats_file = '{file}.{pid}.tmp'.format(file=self.stats_file, pid=os.getpid())
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp_stats_file, 'w') as stats_file:
+                json.dump(stats, stats_file)
+            os.replace(temp_stats_file, self.stats_file)
+        except OSError:
+            pass
+
+    # Copy a cached executable to out_file, returns False if there is no such entry.
+    def install(self, key, out_file):
+        entry = self.entry_path(key)
+
+        if not os.path.isfile(entry):
+            self.count('misses')
             return False
 
-        for line in data_stdout:
-            if line != '':
-                str_content = line.rstrip().replace('\\', '\\\\')
-                if first_line:
-                    file.write('const char* ' + var_name + '= "\\\n' + str_content + '\\n\\\n')
-                    first_line = False
-                else:
-                    file.write(str_content + '\\n\\\n')
+        # copied rather than hard linked, so a later build which writes to out_file in place
+        # cannot modify the cache entry.  The entry's timestamps are not copied, so out_file
+        # is as new as it would be after compiling it, which make style tools rely on
+        shutil.copy(entry, out_file)
+
+        os.utime(entry)
+        self.count('hits')
+        return True
+
+    def store(self, key, executable):
+        entry = self.entry_path(key)
 
-        file.write('";\n\n')
+        try:
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            temp_entry = '{entry}.{pid}.tmp'.format(entry=entry, pid=os.getpid())
+            shutil.copy2(executable, temp_entry)
+            os.replace(temp_entry, entry)
+            os.utime(entry)
+        except OSError:
+            return
+
+        self.count('stores')
+        self.evict()
+
+    def evict(self):
+        entries = sorted(self.entries())
+        total_size = sum(size for _, size, _ in entries)
+
+        for _, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total_size -= size
+            self.count('evictions')
+
+    def print_stats(self, file):
+        entries = self.entries()
+        stats = self.read_stats()
+
+        hits = stats.get('hits', 0)
+        misses = stats.get('misses', 0)
+
+        print('cache directory:  {dir}'.format(dir=self.cache_dir), file=file)
+        print('entries:          {count}'.format(count=len(entries)), file=file)
+        print('size:             {size:.1f} MiB'.format(size=sum(size for _, size, _ in entries) / 1024 ** 2),
+              file=file)
+        print('max size:         {size:.1f} MiB'.format(size=self.max_size / 1024 ** 2), file=file)
+        print('hits:             {hits}'.format(hits=hits), file=file)
+        print('misses:           {misses}'.format(misses=misses), file=file)
+        print('hit rate:         {rate:.1f}%'.format(rate=100 * hits / (hits + misses) if hits + misses else 0),
+              file=file)
+        print('stores:           {stores}'.format(stores=stats.get('stores', 0)), file=file)
+        print('evictions:        {evictions}'.format(evictions=stats.get('evictions', 0)), file=file)
+
+
+def hash_file_into(digest, path):
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+
+
+# Hash everything which affects the output of a build: the input content, jp2a arguments,
+# the frame delay, player options, the tools used and the giftoa version.
+#
+# Returns None for builds which cannot be cached.
+
+def get_build_cache_key(args, jp2a_args, toolchain, environment):
+    import hashlib
+
+    if args.stdin_frames:
+        return None
 
-    return success
+    digest = hashlib.sha256()
 
+    def update(*values):
+        digest.update(json.dumps(values).encode('utf-8') + b'\n')
 
-def get_framedelay_init_macro_define(macro_name, args):
+    update('giftoa', __version__)
+    update('jp2a_args', jp2a_args)
+    update('framedelay', get_framedelay_init_macro_define('GIFTOA_FRAMEDELAY_INIT', args))
+    update('raw_ansi', args.raw_ansi)
+    update('term', environment.get('TERM'))
+    update('compiler', toolchain.find_tool(args.compiler), toolchain.compiler_version())
+
+    for tool in ('jp2a', 'convert'):
+        update(tool, file_fingerprint(toolchain.find_tool(tool)))
+
+    if args.frame_manifest:
+        input_files = list(yield_paths_from_manifest(args.frame_manifest))
+    elif os.path.isdir(args.input_path):
+        input_files = [os.path.join(args.input_path, name) for name in list_directory_files(args.input_path)]
+    else:
+        input_files = [args.input_path]
+
+    try:
+        for input_file in input_files:
+            # file names in a directory determine frame order, the GIF file name does not matter
+            update('input', os.path.basename(input_file) if len(input_files) > 1 else None)
+            hash_file_into(digest, input_file)
+    except OSError:
+        # an unreadable frame is not cached, the build reports it when rendering the frame
+        return None
+
+    return digest.hexdigest()
+
+
+# Rough number of bytes of memory a C compiler needs per byte of frame source.
+
+COMPILER_MEMORY_PER_SOURCE_BYTE = 10
+
+
+def yield_rendered_frames(environment, image_paths, jp2a_args):
+    # yields None for a frame which jp2a failed to render
+    for image_path in image_paths:
+        yield render_jp2a_frame(environment, image_path, jp2a_args)
+
+
+def uses_jp2a_colors(jp2a_args):
+    return '--colors' in jp2a_args
+
+
+def get_framedelay(args):
     if args.frames_per_second:
         if args.frames_per_second == 1:
             frame_sleep_seconds = 1
@@ -426,6 +1630,12 @@ def get_framedelay_init_macro_define(macro_name, args):
             args.framesleep_nanoseconds else 100000000 if \
             not args.framesleep_seconds else 0
 
+    return frame_sleep_seconds, frame_sleep_nanoseconds
+
+
+def get_framedelay_init_macro_define(macro_name, args):
+    frame_sleep_seconds, frame_sleep_nanoseconds = get_framedelay(args)
+
     return '#define {macro_name}(VAR) ' \
            'VAR.tv_nsec = {nanoseconds}; ' \
            'VAR.tv_sec = {seconds};' \
@@ -434,40 +1644,663 @@ def get_framedelay_init_macro_define(macro_name, args):
                 seconds=frame_sleep_seconds)
 
 
-def yield_paths_from_stdin():
-    for path in sys.stdin:
-        path = path.rstrip()
-        if not os.path.isfile(path):
-            arg_parser.error('File "{file}" from stdin does not exist.'.format(file=path))
-        if imghdr.what(path) != 'jpeg':
-            arg_parser.error('File "{file}" from stdin is not a JPEG.'.format(file=path))
+def sniff_image_type(path):
+    import imghdr
+
+    try:
+        return imghdr.what(path)
+    except OSError:
+        # missing files and directories
+        return None
+
+
+# Yield (path, image_type) for every path in the iterable, in order.
+#
+# Files are sniffed concurrently on a bounded thread pool while the consumer
+# renders previous frames, instead of in a pass over every file before rendering starts.
+
+def yield_sniffed_in_order(paths, max_workers):
+    import concurrent.futures
+
+    max_pending = max_workers * 4
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = collections.deque()
+
+        for path in paths:
+            pending.append((path, pool.submit(sniff_image_type, path)))
+
+            while pending and (len(pending) >= max_pending or pending[0][1].done()):
+                path, future = pending.popleft()
+                yield path, future.result()
+
+        while pending:
+            path, future = pending.popleft()
+            yield path, future.result()
+
+
+def list_directory_files(directory):
+    return sorted((entry.name for entry in os.scandir(directory) if entry.is_file()), key=natural_sort_key)
+
+
+def yield_paths_from_directory(directory, max_workers):
+    paths = (os.path.join(directory, name) for name in list_directory_files(directory))
+
+    for path, image_type in yield_sniffed_in_order(paths, max_workers):
+        if image_type == 'jpeg':
+            yield path
+
+
+def yield_paths_from_manifest(manifest_path):
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    with open(manifest_path) as manifest:
+        for path in manifest:
+            path = path.strip()
+            if path:
+                yield os.path.join(manifest_dir, path)
+
+
+def yield_paths_from_stdin(max_workers=1, error=None, read_ahead=True):
+    if error is None:
+        error = arg_parser.error
+
+    paths = (path.rstrip() for path in sys.stdin)
+
+    if read_ahead:
+        sniffed_paths = yield_sniffed_in_order(paths, max_workers)
+    else:
+        # a live stream can stall at any time, so every path is checked as soon as it
+        # is read, instead of waiting in the pool while the next line is read from stdin
+        sniffed_paths = ((path, sniff_image_type(path)) for path in paths)
+
+    for path, image_type in sniffed_paths:
+        if image_type is None and not os.path.isfile(path):
+            error('File "{file}" from stdin does not exist.'.format(file=path))
+        if image_type != 'jpeg':
+            error('File "{file}" from stdin is not a JPEG.'.format(file=path))
         yield path
 
 
-def main():
-    args = arg_parser.parse_known_args()
+class LiveStreamError(Exception):
+    pass
+
+
+def raise_live_stream_error(message):
+    # errors are raised to the main thread so they are reported after leaving the alternate screen
+    raise LiveStreamError(message)
+
+
+def write_to_terminal(fd, text):
+    data = memoryview(text.encode())
+
+    while data:
+        data = data[os.write(fd, data):]
+
+
+# Display frames on the terminal as they are rendered, for --live.
+#
+# Frames are rendered on a background thread into a queue which holds at most buffer_size
+# frames.  Rendering, and reading from stdin, blocks while the queue is full, so memory use
+# stays the same no matter how long the stream is.  The lines of each frame are yielded once
+# it has been displayed so that the stream can be recorded.
+#
+# Playback ends at the end of the stream, or on SIGINT.
+
+def play_live_frames(rendered_frames, framedelay, buffer_size, colors):
+    import queue
+    import threading
+    import time
+
+    frames = queue.Queue(maxsize=buffer_size)
+    end_of_stream = object()
+
+    def render():
+        try:
+            for lines in rendered_frames:
+                frames.put(lines)
+                if lines is None:
+                    return
+        except BaseException as e:
+            frames.put(e)
+            return
+
+        frames.put(end_of_stream)
+
+    threading.Thread(target=render, daemon=True).start()
+
+    frame_delay = framedelay[0] + framedelay[1] / 1000000000
+    terminal = sys.stdout.fileno()
+
+    write_to_terminal(terminal, ANSI_ENTER_SCREEN)
 
     try:
-        _ = subprocess.check_output(['which', 'jp2a'])
-    except:
+        deadline = time.monotonic()
+
+        while True:
+            lines = frames.get()
+
+            if lines is end_of_stream:
+                return
+
+            if isinstance(lines, BaseException):
+                raise lines
+
+            if lines is None:
+                yield None
+                return
+
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            write_to_terminal(terminal, build_ansi_frame(get_frame_runs(lines, colors)))
+
+            # when frames arrive late, wait a full frame delay from now rather than catching up
+            deadline = max(deadline + frame_delay, time.monotonic())
+
+            yield lines
+    except KeyboardInterrupt:
+        return
+    finally:
+        write_to_terminal(terminal, ANSI_LEAVE_SCREEN)
+
+
+def giftoa_cache_dir():
+    if os.environ.get('GIFTOA_CACHE_DIR'):
+        return os.environ['GIFTOA_CACHE_DIR']
+
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'giftoa')
+
+
+def file_fingerprint(path):
+    stat = os.stat(path)
+    return [path, stat.st_mtime_ns, stat.st_size]
+
+
+# Facts about the toolchain which are slow to discover: the paths of the tools giftoa runs,
+# whether the compiler can link with -lrt, and which clock_gettime implementation to use.
+#
+# Facts are kept per compiler command in a state file in the giftoa cache directory,
+# and are discarded when PATH changes or any of the tools found are modified.
+
+class ToolchainState:
+    def __init__(self, compiler):
+        self.compiler = compiler
+        self.state_file = os.path.join(giftoa_cache_dir(), 'toolchain.json')
+        self.facts = self.load()
+        self.dirty = False
+
+    def load(self):
+        empty = {'version': __version__, 'path_env': os.environ.get('PATH', ''), 'tools': {}}
+
+        try:
+            with open(self.state_file) as state_file:
+                facts = json.load(state_file)[self.compiler]
+
+            if facts['version'] != empty['version'] or facts['path_env'] != empty['path_env']:
+                return empty
+
+            for tool in facts['tools'].values():
+                if file_fingerprint(tool[0]) != tool:
+                    return empty
+        except (OSError, ValueError, KeyError, TypeError):
+            return empty
+
+        return facts
+
+    def find_tool(self, command):
+        if command in self.facts['tools']:
+            return self.facts['tools'][command][0]
+
+        path = shutil.which(command)
+        if path is None:
+            return None
+
+        self.facts['tools'][command] = file_fingerprint(path)
+        self.dirty = True
+        return path
+
+    def get_fact(self, name):
+        return self.facts.get(name)
+
+    def set_fact(self, name, value):
+        if self.facts.get(name) != value:
+            self.facts[name] = value
+            self.dirty = True
+
+    def compiler_version(self):
+        if 'compiler_version' not in self.facts:
+            try:
+                version = subprocess.check_output([self.compiler, '--version'], stderr=subprocess.STDOUT).decode()
+            except (subprocess.CalledProcessError, OSError):
+                version = None
+            self.set_fact('compiler_version', version)
+        return self.facts['compiler_version']
+
+    def clock_gettime_impl(self):
+        if 'clock_impl' not in self.facts:
+            self.set_fact('clock_impl', get_clock_gettime_impl())
+        return self.facts['clock_impl']
+
+    def save(self):
+        if not self.dirty:
+            return
+
+        try:
+            with open(self.state_file) as state_file:
+                state = json.load(state_file)
+            if not isinstance(state, dict):
+                state = {}
+        except (OSError, ValueError):
+            state = {}
+
+        state[self.compiler] = self.facts
+
+        # the state file is a cache, failing to write it is not an error
+        try:
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            temp_state_file = '{file}.{pid}'.format(file=self.state_file, pid=os.getpid())
+            with open(temp_state_file, 'w') as state_file:
+                json.dump(state, state_file)
+            os.replace(temp_state_file, self.state_file)
+        except OSError:
+            return
+
+        self.dirty = False
+
+
+# Toolchain state is kept for the life of the process, so long running processes
+# (giftoa serve workers) do not check the state file on every build.
+
+toolchain_states = {}
+
+
+def get_toolchain_state(compiler):
+    if compiler not in toolchain_states:
+        toolchain_states[compiler] = ToolchainState(compiler)
+    return toolchain_states[compiler]
+
+
+serve_arg_parser = argparse.ArgumentParser(
+    prog='giftoa serve',
+
+    description=
+    'Run giftoa as a local build service.  Builds are requested over HTTP, either on a localhost '
+    'TCP port or on a Unix socket, and are run by a pool of warm worker processes.',
+
+    epilog=
+    'POST /build with the GIF as the request body, or with a "path" query parameter naming a GIF file, '
+    'directory or URL instead.  Each "arg" query parameter is passed as a command line argument to giftoa, '
+    'including jp2a options, for example: /build?arg=-fps&arg=25&arg=--invert.  The response body is the '
+    'compiled executable.  GET /metrics returns queue depth, job counts and build latency as JSON.'
+)
+
+serve_arg_parser.add_argument('--host', default='127.0.0.1',
+                              help='The address to listen on, default is 127.0.0.1.')
+
+serve_arg_parser.add_argument('--port', type=int, default=8377,
+                              help='The TCP port to listen on, default is 8377.')
+
+serve_arg_parser.add_argument('--socket', dest='socket_path', default=None,
+                              help='Listen on a Unix socket at this path instead of a TCP port.')
+
+serve_arg_parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                              help='The number of builds to run concurrently, '
+                                   'default is the number of CPUs.')
+
+serve_arg_parser.add_argument('--max-queue', dest='max_queue', type=int, default=64,
+                              help='The number of builds that may be waiting for a worker before new '
+                                   'requests are rejected with 503, default is 64.')
+
+serve_arg_parser.add_argument('-cc', '--compiler', type=str, default='cc',
+                              help='The command used to invoke the C compiler for every build, default is "cc".  '
+                                   'Build requests cannot choose the compiler.')
+
+
+# Destinations of the command line options which are controlled by the build service itself,
+# or which do not produce an executable.  The compiler is a giftoa serve option, a build request
+# naming it could run any executable on the host.
+
+SERVE_RESERVED_DESTS = {'input_path', 'out_file', 'stdin_frames', 'frame_manifest', 'cache_stats', 'compiler'}
+
+
+class ServeArgumentError(Exception):
+    pass
+
+
+class ServeArgumentParser(argparse.ArgumentParser):
+    def error(self, message):
+        raise ServeArgumentError(message)
+
+
+# Find the reserved options used in a build request's arguments.  They are parsed the same
+# way arg_parser parses them, including abbreviated options and values attached to short
+# options, but without arg_parser's type checks, which would download a URL given to -i.
+
+def get_serve_reserved_args(argv):
+    check_parser = ServeArgumentParser(add_help=False, allow_abbrev=arg_parser.allow_abbrev)
+
+    for action in arg_parser._actions:
+        if not action.option_strings:
+            continue
+
+        if action.nargs == 0:
+            check_parser.add_argument(*action.option_strings, dest=action.dest,
+                                      action='store_const', const=True, default=argparse.SUPPRESS)
+        else:
+            check_parser.add_argument(*action.option_strings, dest=action.dest,
+                                      nargs=action.nargs, default=argparse.SUPPRESS)
+
+    reserved = ['serve'] if argv[:1] == ['serve'] else []
+
+    used_dests = vars(check_parser.parse_known_args(argv)[0])
+
+    for action in arg_parser._actions:
+        if action.dest in SERVE_RESERVED_DESTS and action.dest in used_dests:
+            reserved.append('/'.join(action.option_strings))
+
+    return reserved
+
+
+# Run a single build in a warm worker process.
+#
+# Returns (exit_code, error_output, executable_bytes).
+
+def serve_worker_build(argv, gif_data):
+    import contextlib
+    import io
+    import tempfile
+
+    global downloaded_gif_temp_file
+
+    downloaded_gif_temp_file = None
+
+    error_output = io.StringIO()
+
+    with tempfile.TemporaryDirectory() as job_dir:
+        argv = list(argv)
+
+        if gif_data is not None:
+            input_path = os.path.join(job_dir, 'input.gif')
+            with open(input_path, 'wb') as input_file:
+                input_file.write(gif_data)
+            argv += ['-i', input_path]
+
+        out_file = os.path.join(job_dir, 'output')
+        argv += ['-o', out_file]
+
+        with contextlib.redirect_stderr(error_output), contextlib.redirect_stdout(error_output):
+            try:
+                exit_code = main(argv)
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else 1
+            finally:
+                if downloaded_gif_temp_file:
+                    downloaded_gif_temp_file.delete()
+                    downloaded_gif_temp_file = None
+
+        if exit_code == 0 and os.path.isfile(out_file):
+            with open(out_file, 'rb') as executable:
+                return 0, error_output.getvalue(), executable.read()
+
+        return exit_code or 1, error_output.getvalue(), None
+
+
+def serve_worker_init(compiler):
+    import signal
+
+    # the server process handles interrupts and terminates the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    toolchain = get_toolchain_state(compiler)
+
+    for tool in (compiler, 'jp2a', 'convert'):
+        toolchain.find_tool(tool)
+
+
+class BuildService:
+    def __init__(self, jobs, max_queue, compiler):
+        import multiprocessing
+        import threading
+
+        self.pool = multiprocessing.Pool(processes=jobs, initializer=serve_worker_init, initargs=(compiler,))
+        self.slots = threading.Semaphore(jobs)
+        self.max_queue = max_queue
+        self.jobs = jobs
+        self.compiler = compiler
+
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.latencies = collections.deque(maxlen=1000)
+
+    # Run a build, waiting in the queue if every worker is busy.  Returns (exit_code, error_output,
+    # executable_bytes), or None if the queue is full.
+    def build(self, argv, gif_data):
+        import time
+
+        start_time = time.monotonic()
+
+        # only requests which have to wait for a worker count against --max-queue
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                if self.queued >= self.max_queue:
+                    self.rejected += 1
+                    return None
+                self.queued += 1
+
+            self.slots.acquire()
+
+            with self.lock:
+                self.queued -= 1
+
+        with self.lock:
+            self.running += 1
+
+        try:
+            result = self.pool.apply(serve_worker_build, (list(argv) + ['-cc', self.compiler], gif_data))
+        except Exception as e:
+            result = (1, 'Build worker failed: {error}\n'.format(error=e), None)
+        finally:
+            self.slots.release()
+
+        with self.lock:
+            self.running -= 1
+            if result[0] == 0:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self.latencies.append(time.monotonic() - start_time)
+
+        return result
+
+    def metrics(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+
+            def percentile(p):
+                return latencies[min(len(latencies) - 1, int(len(latencies) * p))] if latencies else None
+
+            return {
+                'jobs': self.jobs,
+                'queue_depth': self.queued,
+                'running': self.running,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'latency_seconds': {
+                    'count': len(latencies),
+                    'mean': sum(latencies) / len(latencies) if latencies else None,
+                    'p50': percentile(0.5),
+                    'p95': percentile(0.95),
+                    'max': latencies[-1] if latencies else None
+                }
+            }
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+
+# Request handling for giftoa serve, combined with http.server.BaseHTTPRequestHandler
+# in serve_main() so that http.server is only imported when serving.
+
+class BuildRequestHandlerMixin:
+    def address_string(self):
+        # client_address is an empty string for Unix sockets
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def send_body(self, code, body, content_type='text/plain; charset=utf-8'):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urllib.parse.urlparse(self.path).path == '/metrics':
+            self.send_body(200, json.dumps(self.server.build_service.metrics(), indent=4) + '\n',
+                           'application/json')
+        else:
+            self.send_body(404, 'Not found.\n')
+
+    def do_POST(self):
+        url = urllib.parse.urlparse(self.path)
+
+        if url.path != '/build':
+            self.send_body(404, 'Not found.\n')
+            return
+
+        query = urllib.parse.parse_qs(url.query)
+
+        argv = query.get('arg', [])
+
+        try:
+            reserved = get_serve_reserved_args(argv)
+        except ServeArgumentError as e:
+            self.send_body(400, 'Invalid arguments in a build request: {message}\n'.format(message=e))
+            return
+
+        if reserved:
+            self.send_body(400, 'Arguments not allowed in a build request: {args}\n'.format(args=' '.join(reserved)))
+            return
+
+        gif_data = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        if 'path' in query:
+            argv += ['-i', query['path'][0]]
+            gif_data = None
+        elif not gif_data:
+            self.send_body(400, 'No GIF data in request body and no "path" given.\n')
+            return
+
+        result = self.server.build_service.build(argv, gif_data)
+
+        if result is None:
+            self.send_body(503, 'Build queue is full.\n')
+        elif result[0] == 0:
+            self.send_body(200, result[2], 'application/octet-stream')
+        else:
+            self.send_body(400, result[1])
+
+
+def serve_main(argv):
+    import http.server
+    import socketserver
+
+    class BuildRequestHandler(BuildRequestHandlerMixin, http.server.BaseHTTPRequestHandler):
+        server_version = 'giftoa/' + __version__
+
+    class ThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+        daemon_threads = True
+
+    class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    args = serve_arg_parser.parse_args(argv)
+
+    if args.jobs < 1:
+        serve_arg_parser.error('argument -j/--jobs: Value cannot be less than 1.')
+
+    if args.max_queue < 0:
+        serve_arg_parser.error('argument --max-queue: Value cannot be less than 0.')
+
+    # workers are started before the server socket exists, so they do not inherit it
+    build_service = BuildService(args.jobs, args.max_queue, args.compiler)
+
+    try:
+        if args.socket_path:
+            if os.path.exists(args.socket_path):
+                os.unlink(args.socket_path)
+            server = ThreadingUnixHTTPServer(args.socket_path, BuildRequestHandler)
+            address = args.socket_path
+        else:
+            server = ThreadingHTTPServer((args.host, args.port), BuildRequestHandler)
+            address = 'http://{host}:{port}'.format(host=args.host, port=server.server_address[1])
+
+        server.build_service = build_service
+
+        print('giftoa serve listening on {address} with {jobs} workers.'.format(address=address, jobs=args.jobs),
+              file=sys.stderr, flush=True)
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if args.socket_path:
+                os.unlink(args.socket_path)
+    finally:
+        build_service.close()
+
+    return 0
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+
+    if argv[:1] == ['serve']:
+        return serve_main(argv[1:])
+
+    args = arg_parser.parse_known_args(argv)
+
+    jp2a_args = args[1]
+    args = args[0]
+
+    if args.cache_stats:
+        ArtifactCache(os.path.join(giftoa_cache_dir(), 'artifacts'), args.cache_max_size).print_stats(sys.stdout)
+        return 0
+
+    toolchain = get_toolchain_state(args.compiler)
+
+    if not toolchain.find_tool('jp2a'):
         print('Cannot find the jp2a command, please install jp2a.  Info: https://csl.name/jp2a/', file=sys.stderr)
         exit(1)
 
-    try:
-        _ = subprocess.check_output(['which', 'convert'])
-    except:
+    if not toolchain.find_tool('convert'):
         print('Cannot find ImageMagick\'s "convert" command, please install ImageMagick.', file=sys.stderr)
         exit(1)
 
-    jp2a_args = args[1]
-    args = args[0]
+    if args.max_temp_disk and not toolchain.find_tool('identify'):
+        print('Cannot find ImageMagick\'s "identify" command, which is required by --max-temp-disk.', file=sys.stderr)
+        exit(1)
 
-    try:
-        _ = subprocess.check_output(['which', args.compiler])
-    except:
+    if not toolchain.find_tool(args.compiler):
         print('Unable to find C compiler "{}", please specify or install one.'.format(args.compiler), file=sys.stderr)
         exit(1)
 
+    toolchain.save()
+
     if args.frames_per_second and (args.framesleep_seconds or args.framesleep_nanoseconds):
         arg_parser.error('-fss (--framesleep-seconds) and -fsn (--framesleep-nanoseconds) '
                          'cannot be used with -fps (--frames-per-second).')
@@ -478,8 +2311,17 @@ def main():
     if args.stdin_frames and input_path:
         arg_parser.error('-i/--input and --stdin-frames cannot be used together.')
 
-    if not input_path and not args.stdin_frames:
-        arg_parser.error('-i/--input must be specified when not using --stdin-frames.')
+    if args.live and not args.stdin_frames:
+        arg_parser.error('--live can only be used with --stdin-frames.')
+
+    if args.frame_manifest and (input_path or args.stdin_frames):
+        arg_parser.error('--frame-manifest cannot be used with -i/--input or --stdin-frames.')
+
+    if not input_path and not args.stdin_frames and not args.frame_manifest:
+        arg_parser.error('-i/--input must be specified when not using --stdin-frames or --frame-manifest.')
+
+    if args.frame_manifest and not args.out_file:
+        arg_parser.error('-o/--output must be specified when using --frame-manifest.')
 
     if downloaded_gif_temp_file and not args.out_file:
         arg_parser.error('-o/--output must be specified when -i/--input is a URL.')
@@ -487,109 +2329,247 @@ def main():
     out_file = args.out_file
     compiler = args.compiler
 
+    if not out_file and input_path and os.path.isfile(input_path):
+        out_file = os.path.splitext(os.path.basename(input_path))[0]
+
     environment = os.environ.copy()
 
     if 'TERM' not in environment:
         environment['TERM'] = 'xterm'
 
+    artifact_cache = None
+    cache_key = None
+
+    if args.cache and out_file:
+        artifact_cache = ArtifactCache(os.path.join(giftoa_cache_dir(), 'artifacts'), args.cache_max_size)
+        cache_key = get_build_cache_key(args, jp2a_args, toolchain, environment)
+        toolchain.save()
+
+        try:
+            if cache_key and artifact_cache.install(cache_key, out_file):
+                return 0
+        except OSError as e:
+            # for example when the directory of out_file does not exist
+            print('Unable to write executable "{file}": {error}'.format(file=out_file, error=e.strerror),
+                  file=sys.stderr)
+            return 1
+
+    import hashlib
+    import io
+    import tempfile
+
     with tempfile.TemporaryDirectory() as temp_dir:
 
+        convert_limits = []
+
+        if args.max_memory:
+            convert_limits += ['-limit', 'memory', str(args.max_memory), '-limit', 'map', str(args.max_memory)]
+
+        if args.max_temp_disk:
+            convert_limits += ['-limit', 'disk', str(args.max_temp_disk)]
+
         if args.stdin_frames:
-            image_paths = yield_paths_from_stdin()
+            image_paths = yield_paths_from_stdin(args.ingest_workers,
+                                                 error=raise_live_stream_error if args.live else None,
+                                                 read_ahead=not args.live)
+        elif args.frame_manifest:
+            image_paths = yield_paths_from_manifest(args.frame_manifest)
         elif os.path.isfile(input_path):
-            if not out_file:
-                out_file = os.path.splitext(os.path.basename(input_path))[0]
-
-            subprocess.call([
-                'convert',
-                '-background', 'none',
-                input_path,
-                '-coalesce',
-                '-bordercolor', 'none',
-                '-frame', '0', os.path.join(temp_dir, '%d.jpg')])
-
-            image_paths = sorted(os.listdir(temp_dir), key=natural_sort_key)
-            image_paths = (os.path.join(temp_dir, path) for path in image_paths)
+            frame_count = None
+            chunk_size = None
+
+            if args.max_temp_disk:
+                gif_info = get_gif_info(input_path)
+                if gif_info is None:
+                    # decoding the whole GIF at once is what --max-temp-disk is meant to prevent
+                    arg_parser.error('Failed reading the frame count and size of GIF "{file}" with ImageMagick\'s '
+                                     'identify, which is required by --max-temp-disk.'.format(file=input_path))
+                    # parser.error calls exit(2) immediately
+
+                frame_count = gif_info[0]
+                # an uncompressed frame is larger than a decoded JPEG will be
+                frame_bytes = max(1, gif_info[1] * gif_info[2] * 3)
+                chunk_size = max(1, args.max_temp_disk // frame_bytes)
+
+            image_paths = yield_gif_frame_paths(input_path, temp_dir, convert_limits,
+                                                frame_count=frame_count, chunk_size=chunk_size)
         else:
             if not out_file:
                 arg_parser.error('No output file specified, an output file must be specified '
                                  'when passing a directory to -i/--input.')
                 # parser.error calls exit(2) immediately
 
-            image_paths = (file for file in os.listdir(input_path) if
-                           imghdr.what(os.path.join(input_path, file)) == 'jpeg')
+            # the directory being empty of jpegs is detected after rendering, since
+            # file types are checked while frames are being rendered
+            image_paths = yield_paths_from_directory(input_path, args.ingest_workers)
 
-            image_paths = sorted(image_paths, key=natural_sort_key)
+        colors = uses_jp2a_colors(jp2a_args)
 
-            if len(image_paths) == 0:
-                arg_parser.error('No jp2a compatible images found in directory "{dir}".'.format(dir=input_path))
-                # parser.error calls exit(2) immediately
+        rendered_frames = yield_rendered_frames(environment, image_paths, jp2a_args)
+
+        if args.live:
+            rendered_frames = play_live_frames(rendered_frames,
+                                               framedelay=get_framedelay(args),
+                                               buffer_size=args.live_buffer,
+                                               colors=colors)
 
-            image_paths = (os.path.join(input_path, path) for path in image_paths)
+            if not out_file:
+                try:
+                    return 1 if any(lines is None for lines in rendered_frames) else 0
+                except LiveStreamError as e:
+                    arg_parser.error(str(e))
 
         source_file_path = os.path.join(temp_dir, 'program.c')
 
-        with open(source_file_path, 'w') as source_file:
+        if args.max_memory:
+            frame_sources = FrameSourceFiles(temp_dir, compiler,
+                                             max_bytes=max(1, args.max_memory // COMPILER_MEMORY_PER_SOURCE_BYTE),
+                                             raw_ansi=args.raw_ansi,
+                                             colors=colors)
+        else:
+            frame_sources = None
+
+        with open(source_file_path, 'w', encoding='utf-8') as source_file:
+
+            frame_cvars = []
+
+            # identical frames (held frames, static images) share one variable, which
+            # keeps the binary small and lets the player skip redrawing them
+            frame_cvars_by_digest = {}
+
+            source_file.write(C_RAW_HEADERS if args.raw_ansi else C_HEADERS)
+
+            if colors and not args.raw_ansi:
+                source_file.write(C_CURSES_COLOR_SUPPORT)
+
+            try:
+                for frame, lines in enumerate(rendered_frames):
+
+                    if lines is None:
+                        return 1
+
+                    frame_digest = hashlib.sha1('\n'.join(lines).encode('utf-8')).digest()
+
+                    if frame_digest in frame_cvars_by_digest:
+                        frame_cvars.append(frame_cvars_by_digest[frame_digest])
+                        continue
+
+                    cvar_name = 'frame_' + str(frame)
 
-            frame_cvar_names = []
+                    if frame_sources:
+                        source_file.write(get_frame_cvar_extern_declaration(cvar_name,
+                                                                            raw_ansi=args.raw_ansi,
+                                                                            colors=colors))
 
-            source_file.write(C_HEADERS)
+                    # the frame is written with a single write, so that a --live stream which is
+                    # interrupted with Ctrl-C never leaves part of a frame in the source
+                    frame_code = io.StringIO()
 
-            for frame, image_path in enumerate(image_paths):
+                    frame_size = write_frame_lines_cvar_into_file(
+                        file=frame_code,
+                        var_name=cvar_name,
+                        lines=lines,
+                        raw_ansi=args.raw_ansi,
+                        colors=colors)
 
-                cvar_name = 'frame_' + str(frame)
+                    (frame_sources.get_file() if frame_sources else source_file).write(frame_code.getvalue())
 
-                frame_cvar_names.append(cvar_name)
+                    frame_cvars.append((cvar_name, frame_size))
+                    frame_cvars_by_digest[frame_digest] = (cvar_name, frame_size)
 
-                success = write_jp2a_cvar_into_file(environment=environment,
-                                                    file=source_file,
-                                                    var_name=cvar_name,
-                                                    image_filename=image_path,
-                                                    jp2a_args=jp2a_args)
+                    if frame_sources:
+                        frame_sources.frame_written()
+            except LiveStreamError as e:
+                arg_parser.error(str(e))
+            except KeyboardInterrupt:
+                if not args.live:
+                    raise
 
-                if not success:
-                    return 1
+                # Ctrl-C ends a --live stream while a frame is being written the same as it
+                # does during playback, the frames written so far are still compiled
+                rendered_frames.close()
+            finally:
+                if frame_sources:
+                    # makes sure a compiler is not left running if rendering failed
+                    frame_sources.wait()
 
-            write_clock_gettime_impl(source_file)
-            source_file.write('#define GIFTOA_FRAMES_INIT {' + ','.join(frame_cvar_names) + '}\n')
+            if frame_sources:
+                frame_sources_code = frame_sources.close()
+
+            if not frame_cvars:
+                if args.stdin_frames:
+                    arg_parser.error('No frames were read from stdin.')
+                elif args.frame_manifest:
+                    arg_parser.error('No frames listed in manifest "{file}".'.format(file=args.frame_manifest))
+                elif input_path and os.path.isdir(input_path):
+                    arg_parser.error('No jp2a compatible images found in directory "{dir}".'.format(dir=input_path))
+                elif input_path:
+                    arg_parser.error('No frames were decoded from GIF "{file}".'.format(file=input_path))
+                # parser.error calls exit(2) immediately
+
+            if frame_sources and frame_sources_code:
+                return frame_sources_code
+
+            write_clock_gettime_impl(source_file, toolchain.clock_gettime_impl())
+            source_file.write(get_frames_init_macro_define(frame_cvars, raw_ansi=args.raw_ansi, colors=colors))
             source_file.write(get_framedelay_init_macro_define('GIFTOA_FRAMEDELAY_INIT', args))
-            source_file.write(C_PROGRAM)
+            source_file.write(C_RAW_PROGRAM if args.raw_ansi else C_PROGRAM)
 
-        compiler_output = GCNamedTempFile(mode='w+')
+        compiler_cmd = [compiler, source_file_path] + \
+                       (frame_sources.object_files if frame_sources else []) + ['-o', out_file]
 
-        compiler_rt_code = 0
+        compiler_libs = [] if args.raw_ansi else ['-lcurses']
 
-        compiler_cmd = [compiler, source_file_path, '-o', out_file]
+        # None when it is not yet known whether the compiler links with -lrt
+        links_rt = toolchain.get_fact('links_rt')
 
-        try:
-            # try with librealtime
+        with open(os.path.join(temp_dir, 'compiler_output.txt'), 'w+') as compiler_output:
+            compiler_rt_code = 1
 
-            print("Compiling with -lrt (librealtime) ...",
-                  file=compiler_output.file, flush=True)
+            if links_rt is not False:
+                try:
+                    # try with librealtime
 
-            subprocess.check_call(
-                compiler_cmd + ['-lcurses', '-lrt'],
-                stderr=subprocess.STDOUT,
-                stdout=compiler_output.file
-            )
+                    print("Compiling with -lrt (librealtime) ...",
+                          file=compiler_output, flush=True)
 
-        except subprocess.CalledProcessError:
-            # try without librealtime
+                    subprocess.check_call(
+                        compiler_cmd + compiler_libs + ['-lrt'],
+                        stderr=subprocess.STDOUT,
+                        stdout=compiler_output
+                    )
 
-            print("Compiling without -lrt (librealtime) ...",
-                  file=compiler_output.file, flush=True)
+                    compiler_rt_code = 0
+                    toolchain.set_fact('links_rt', True)
 
-            compiler_rt_code = subprocess.call(
-                compiler_cmd + ['-lcurses'],
-                stderr=subprocess.STDOUT,
-                stdout=compiler_output.file
-            )
+                except subprocess.CalledProcessError:
+                    pass
 
-        if compiler_rt_code:
-            compiler_output.file.seek(0)
-            shutil.copyfileobj(compiler_output.file, sys.stderr)
-            sys.stderr.flush()
-            return compiler_rt_code
+            if compiler_rt_code:
+                # try without librealtime
+
+                print("Compiling without -lrt (librealtime) ...",
+                      file=compiler_output, flush=True)
+
+                compiler_rt_code = subprocess.call(
+                    compiler_cmd + compiler_libs,
+                    stderr=subprocess.STDOUT,
+                    stdout=compiler_output
+                )
+
+                if compiler_rt_code == 0:
+                    toolchain.set_fact('links_rt', False)
+
+            toolchain.save()
+
+            if compiler_rt_code:
+                compiler_output.seek(0)
+                shutil.copyfileobj(compiler_output, sys.stderr)
+                sys.stderr.flush()
+                return compiler_rt_code
+
+        if cache_key:
+            artifact_cache.store(cache_key, out_file)
 
         return 0
 
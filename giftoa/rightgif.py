@@ -40,6 +40,12 @@ __version__ = '1.0.1.1'
 
 
 
+# The search endpoint can be overridden with the RIGHTGIF_SEARCH_URL environment
+# variable, which is used to test rightgif against a local server.
+
+RIGHTGIF_SEARCH_URL = 'https://rightgif.com/search/web'
+
+
 arg_parser = argparse.ArgumentParser(
     prog='rightgif',
 
@@ -70,7 +76,7 @@ def main():
 
     post_data = urllib.parse.urlencode({'text': query_text}).encode('utf-8')
 
-    request = urllib.request.Request('https://rightgif.com/search/web', 
+    request = urllib.request.Request(os.environ.get('RIGHTGIF_SEARCH_URL', RIGHTGIF_SEARCH_URL), 
                                    data=urllib.parse.urlencode({'text': query_text}).encode('utf-8'), 
                                    headers={'User-Agent': 'Mozilla/5.0'})
 
@@ -81,7 +87,7 @@ def main():
         print('Request Error: {reason}'.format(reason=e.reason), file=sys.stderr)
         exit(1)
     except ValueError as e:
-        print('Error decoding JSON response: "{response}", Reason: "{reason}"'.format(response=response, reason=reason), file=sys.stderr)
+        print('Error decoding JSON response: "{response}", Reason: "{reason}"'.format(response=response, reason=e), file=sys.stderr)
         exit(1) 
 
     print(json_response["url"])
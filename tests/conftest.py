@@ -0,0 +1,247 @@
+# Copyright (c) 2016, Teriks
+# All rights reserved.
+
+# conftest.py is part of giftoa
+
+# giftoa is distributed under the following BSD 3-Clause License
+
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer
+#    in the documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Test harness which runs giftoa and rightgif offline, against the stand-in tools in
+# fake_tool.py and a local HTTP server standing in for GIF URLs and rightgif.com.
+
+import collections
+import http.server
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+import pytest
+
+
+tests_path = os.path.dirname(os.path.realpath(__file__))
+src_path = os.path.dirname(tests_path)
+
+giftoa_path = os.path.join(src_path, 'giftoa', 'giftoa.py')
+rightgif_path = os.path.join(src_path, 'giftoa', 'rightgif.py')
+fake_tool_path = os.path.join(tests_path, 'fake_tool.py')
+
+# tests of frame generation import giftoa directly
+sys.path.insert(0, src_path)
+
+
+FAKE_TOOLS = ['jp2a', 'convert', 'identify', 'cc']
+
+
+# Write a file which passes giftoa's GIF type check.  The stand-in convert
+# does not read it, so the content only needs to differ between seeds.
+
+def write_gif(path, seed=0):
+    with open(path, 'wb') as gif_file:
+        gif_file.write(b'GIF89a' + bytes([seed % 256]) * 32)
+
+    return path
+
+
+def write_jpeg(path, seed=0):
+    with open(path, 'wb') as jpeg_file:
+        jpeg_file.write(b'\xff\xd8\xff\xe0\x00\x10JFIF\x00' + bytes([seed % 256]) * 64)
+
+    return path
+
+
+# Read the C sources saved by the stand-in compiler's save_dir option.
+
+def read_saved_sources(save_dir):
+    return [open(os.path.join(save_dir, name), encoding='utf-8').read() for name in sorted(os.listdir(save_dir))]
+
+
+# A completed run of giftoa or rightgif, with the stand-in tools it spawned.
+
+class ToolRun:
+    def __init__(self, process, elapsed, tool_runs):
+        self.returncode = process.returncode
+        self.stdout = process.stdout.decode()
+        self.stderr = process.stderr.decode()
+        self.elapsed = elapsed
+        self.tool_runs = tool_runs
+        self.spawns = collections.Counter(run['tool'] for run in tool_runs)
+
+    def runs_of(self, tool):
+        return [run for run in self.tool_runs if run['tool'] == tool]
+
+    # Total seconds spent in the stand-in tools, or in one tool.  A run which took
+    # less than this ran some of its tools concurrently.
+    def tool_time(self, tool=None):
+        return sum(run['end'] - run['start'] for run in self.tool_runs if tool is None or run['tool'] == tool)
+
+
+# Installs the stand-in tools into a bin directory which is put first on PATH
+# for every run, along with a private giftoa cache directory.
+
+class FakeToolchain:
+    def __init__(self, root):
+        self.root = root
+        self.bin_dir = os.path.join(root, 'bin')
+        self.cache_dir = os.path.join(root, 'cache')
+        self.config_path = os.path.join(root, 'fake_config.json')
+        self.log_path = os.path.join(root, 'fake_log.jsonl')
+        self.config = {}
+
+        os.makedirs(self.bin_dir)
+
+        with open(fake_tool_path) as fake_tool_file:
+            fake_tool_source = fake_tool_file.read()
+
+        for tool in FAKE_TOOLS:
+            tool_path = os.path.join(self.bin_dir, tool)
+            with open(tool_path, 'w') as tool_file:
+                tool_file.write('#!' + sys.executable + '\n' + fake_tool_source)
+            os.chmod(tool_path, 0o755)
+
+        self.configure_all()
+
+    def configure(self, tool, **options):
+        self.config.setdefault(tool, {}).update(options)
+        self.configure_all()
+
+    def configure_all(self):
+        with open(self.config_path, 'w') as config_file:
+            json.dump(self.config, config_file)
+
+    def environment(self, extra=None):
+        environment = dict(os.environ)
+        environment['PATH'] = self.bin_dir + os.pathsep + environment.get('PATH', '')
+        environment['GIFTOA_CACHE_DIR'] = self.cache_dir
+        environment['GIFTOA_FAKE_CONFIG'] = self.config_path
+        environment['GIFTOA_FAKE_LOG'] = self.log_path
+        environment['PYTHONWARNINGS'] = 'ignore::DeprecationWarning'
+        environment.update(extra or {})
+        return environment
+
+    def read_log(self):
+        try:
+            with open(self.log_path) as log_file:
+                return [json.loads(line) for line in log_file]
+        except OSError:
+            return []
+
+    def run(self, script_path, args, input=None, extra_environment=None):
+        if os.path.exists(self.log_path):
+            os.unlink(self.log_path)
+
+        start_time = time.perf_counter()
+
+        process = subprocess.run([sys.executable, script_path] + list(args),
+                                 input=input,
+                                 stdout=subprocess.PIPE,
+                                 stderr=subprocess.PIPE,
+                                 env=self.environment(extra_environment),
+                                 cwd=self.root,
+                                 timeout=120)
+
+        return ToolRun(process, time.perf_counter() - start_time, self.read_log())
+
+    def giftoa(self, *args, input=None, extra_environment=None):
+        return self.run(giftoa_path, args, input=input, extra_environment=extra_environment)
+
+    def rightgif(self, *args, extra_environment=None):
+        return self.run(rightgif_path, args, extra_environment=extra_environment)
+
+    # Start giftoa without waiting for it, for tests which talk to a running
+    # giftoa, such as giftoa serve or --live.
+    def start_giftoa(self, *args, extra_environment=None, **popen_options):
+        return subprocess.Popen([sys.executable, giftoa_path] + list(args),
+                                env=self.environment(extra_environment),
+                                cwd=self.root,
+                                **popen_options)
+
+
+# Local HTTP server serving GIF files at fixed paths, and answering rightgif
+# searches with canned URLs.  Every request is recorded.
+
+class HttpStandIn:
+    def __init__(self):
+        self.files = {}
+        self.search_results = {}
+        self.latency = 0
+        self.requests = []
+
+        stand_in = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+
+            def log_message(self, format, *args):
+                pass
+
+            def reply(self, code, body, content_type='application/octet-stream'):
+                self.send_response(code)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                stand_in.requests.append(('GET', self.path))
+                time.sleep(stand_in.latency)
+
+                if self.path in stand_in.files:
+                    self.reply(200, stand_in.files[self.path], 'image/gif')
+                else:
+                    self.reply(404, b'not found', 'text/plain')
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+                stand_in.requests.append(('POST', self.path))
+                time.sleep(stand_in.latency)
+
+                text = urllib.parse.parse_qs(body).get('text', [''])[0]
+
+                if self.path != '/search/web':
+                    self.reply(404, b'not found', 'text/plain')
+                elif text in stand_in.search_results:
+                    self.reply(200, json.dumps({'url': stand_in.search_results[text]}).encode(), 'application/json')
+                else:
+                    self.reply(200, b'<html>no results</html>', 'text/html')
+
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def url(self, path):
+        return 'http://127.0.0.1:{port}{path}'.format(port=self.server.server_address[1], path=path)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def toolchain(tmp_path):
+    return FakeToolchain(str(tmp_path))
+
+
+@pytest.fixture
+def http_stand_in():
+    stand_in = HttpStandIn()
+    yield stand_in
+    stand_in.close()
@@ -0,0 +1,199 @@
+# Copyright (c) 2016, Teriks
+# All rights reserved.
+
+# fake_tool.py is part of giftoa
+
+# giftoa is distributed under the following BSD 3-Clause License
+
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer
+#    in the documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Stand-in for the external tools giftoa runs: jp2a, convert, identify and a C compiler.
+# The test harness installs a copy of this script on PATH under the name of each tool,
+# and the name it is run as decides which tool it behaves like.
+#
+# Behavior is scripted with a JSON file named by GIFTOA_FAKE_CONFIG, with an object per
+# tool name which may contain:
+#
+#   latency   Seconds to sleep before doing anything.
+#   fail      Exit with a non zero status after writing an error to stderr.
+#   fail_arg  Only fail when this argument is given, for example "-lrt".
+#   frames    (convert, identify) The number of frames in every GIF.
+#   distinct  (convert) The number of distinct frames, frames repeat after this many.
+#   save_dir  (cc) A directory to copy every C source file given to the compiler into.
+#
+# Every run is appended as a line of JSON to the file named by GIFTOA_FAKE_LOG.
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+
+JP2A_CHARS = ' .:-=+*#%@'
+
+JP2A_WIDTH = 20
+JP2A_HEIGHT = 6
+
+
+def load_config(tool):
+    try:
+        with open(os.environ['GIFTOA_FAKE_CONFIG']) as config_file:
+            return json.load(config_file).get(tool, {})
+    except (KeyError, OSError, ValueError):
+        return {}
+
+
+def log_run(tool, args, start_time):
+    log_path = os.environ.get('GIFTOA_FAKE_LOG')
+    if not log_path:
+        return
+
+    record = {'tool': tool, 'args': args, 'start': start_time, 'end': time.time(), 'pid': os.getpid()}
+
+    # each record is a single small write, so concurrent tools do not interleave lines
+    with open(log_path, 'a') as log_file:
+        log_file.write(json.dumps(record) + '\n')
+
+
+def fake_jp2a(args, config):
+    try:
+        with open(args[0], 'rb') as image_file:
+            digest = hashlib.md5(image_file.read()).digest()
+    except OSError:
+        print('jp2a: Can\'t open file {file}'.format(file=args[0]), file=sys.stderr)
+        return 1
+
+    colors = '--colors' in args
+
+    for row in range(JP2A_HEIGHT):
+        line = ''
+        for column in range(JP2A_WIDTH):
+            value = digest[(row * JP2A_WIDTH + column) % len(digest)] ^ (row * 7 + column)
+            char = JP2A_CHARS[value % len(JP2A_CHARS)]
+            if colors:
+                line += '\x1b[{bold};{color}m{char}'.format(bold=value % 2, color=30 + value % 8, char=char)
+            else:
+                line += char
+        if colors:
+            line += '\x1b[0m'
+        print(line)
+
+    return 0
+
+
+def get_frame_range(value, frame_count):
+    first, last = value.split('-', 1)
+    first = int(first)
+    last = int(last)
+    return first, frame_count + last if last < 0 else last
+
+
+def fake_convert(args, config):
+    frame_count = config.get('frames', 4)
+    distinct = config.get('distinct', frame_count)
+
+    frames = list(range(frame_count))
+    scene = 0
+
+    i = 0
+    while i < len(args):
+        if args[i] == '-delete':
+            first, last = get_frame_range(args[i + 1], frame_count)
+            frames = [frame for frame in frames if not first <= frame <= last]
+            i += 1
+        elif args[i] == '-scene':
+            scene = int(args[i + 1])
+            i += 1
+        i += 1
+
+    output_pattern = args[-1]
+
+    for index, frame in enumerate(frames):
+        with open(output_pattern.replace('%d', str(scene + index)), 'wb') as frame_file:
+            frame_file.write(b'\xff\xd8\xff\xe0\x00\x10JFIF\x00' + bytes([frame % distinct]) * 64)
+
+    return 0
+
+
+def fake_identify(args, config):
+    frame_count = config.get('frames', 4)
+
+    for _ in range(frame_count):
+        print('{frames} {width} {height}'.format(frames=frame_count, width=JP2A_WIDTH, height=JP2A_HEIGHT))
+
+    return 0
+
+
+def fake_cc(args, config):
+    if '--version' in args:
+        print('fake cc 1.0')
+        return 0
+
+    if config.get('save_dir'):
+        for arg in args:
+            if arg.endswith('.c'):
+                save_path = os.path.join(config['save_dir'], '{pid}_{name}'.format(pid=os.getpid(),
+                                                                                    name=os.path.basename(arg)))
+                shutil.copyfile(arg, save_path)
+
+    output_path = args[args.index('-o') + 1]
+
+    if '-c' in args:
+        with open(output_path, 'wb') as object_file:
+            object_file.write(b'fake object\n')
+    else:
+        with open(output_path, 'w') as executable_file:
+            executable_file.write('#!/bin/sh\necho fake player\n')
+        os.chmod(output_path, 0o755)
+
+    return 0
+
+
+TOOLS = {
+    'jp2a': fake_jp2a,
+    'convert': fake_convert,
+    'identify': fake_identify,
+    'cc': fake_cc
+}
+
+
+def main():
+    tool = os.path.basename(sys.argv[0])
+    args = sys.argv[1:]
+    config = load_config(tool)
+
+    start_time = time.time()
+
+    try:
+        time.sleep(config.get('latency', 0))
+
+        fail_arg = config.get('fail_arg')
+
+        if config.get('fail') and (fail_arg is None or fail_arg in args):
+            print('{tool}: scripted failure'.format(tool=tool), file=sys.stderr)
+            return 1
+
+        return TOOLS[tool](args, config)
+    finally:
+        log_run(tool, args, start_time)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,261 @@
+# Copyright (c) 2016, Teriks
+# All rights reserved.
+
+# test_build.py is part of giftoa
+
+# giftoa is distributed under the following BSD 3-Clause License
+
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer
+#    in the documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Stage and subprocess counts for builds run against the stand-in tools.
+
+import os
+import re
+import time
+
+from conftest import read_saved_sources, write_gif, write_jpeg
+
+
+def get_frames_init(source):
+    return re.search(r'#define GIFTOA_FRAMES_INIT \{(.*)\}', source).group(1).split(',')
+
+
+def test_gif_build(toolchain):
+    toolchain.configure('convert', frames=5)
+    write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    run = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat')
+
+    assert run.returncode == 0, run.stderr
+    assert run.spawns == {'convert': 1, 'jp2a': 5, 'cc': 1}
+    assert os.access(os.path.join(toolchain.root, 'cat'), os.X_OK)
+
+
+def test_directory_build(toolchain):
+    frames_dir = os.path.join(toolchain.root, 'frames')
+    os.makedirs(frames_dir)
+
+    for frame in range(3):
+        write_jpeg(os.path.join(frames_dir, 'frame{n}.jpg'.format(n=frame)), seed=frame)
+
+    with open(os.path.join(frames_dir, 'notes.txt'), 'w') as notes:
+        notes.write('not a frame')
+
+    run = toolchain.giftoa('-i', 'frames', '-o', 'out')
+
+    assert run.returncode == 0, run.stderr
+    assert run.spawns == {'jp2a': 3, 'cc': 1}
+    assert [os.path.basename(jp2a['args'][0]) for jp2a in run.runs_of('jp2a')] == \
+           ['frame0.jpg', 'frame1.jpg', 'frame2.jpg']
+
+
+def test_stdin_frames_build(toolchain):
+    paths = [write_jpeg(os.path.join(toolchain.root, '{n}.jpg'.format(n=frame)), seed=frame) for frame in range(4)]
+
+    run = toolchain.giftoa('--stdin-frames', '-o', 'out', input='\n'.join(paths).encode())
+
+    assert run.returncode == 0, run.stderr
+    assert run.spawns == {'jp2a': 4, 'cc': 1}
+
+
+def test_identical_frames_share_a_variable(toolchain):
+    save_dir = os.path.join(toolchain.root, 'sources')
+    os.makedirs(save_dir)
+
+    toolchain.configure('convert', frames=6, distinct=2)
+    toolchain.configure('cc', save_dir=save_dir)
+    write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    run = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat')
+
+    assert run.returncode == 0, run.stderr
+
+    source, = read_saved_sources(save_dir)
+
+    assert get_frames_init(source) == ['frame_0', 'frame_1'] * 3
+    assert source.count('const char* frame_') == 2
+
+
+def test_failed_frame_stops_build(toolchain):
+    toolchain.configure('jp2a', fail=True)
+    write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    run = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat')
+
+    assert run.returncode == 1
+    assert run.spawns['jp2a'] == 1
+    assert run.spawns['cc'] == 0
+
+
+def test_toolchain_facts_are_cached(toolchain):
+    toolchain.configure('cc', fail=True, fail_arg='-lrt')
+    write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    first = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat')
+    second = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat')
+
+    assert first.returncode == 0, first.stderr
+    assert second.returncode == 0, second.stderr
+
+    # the first build finds out that the compiler does not link with -lrt
+    assert first.spawns['cc'] == 2
+    assert second.spawns['cc'] == 1
+    assert '-lrt' not in second.runs_of('cc')[0]['args']
+
+
+def test_artifact_cache_hit_spawns_nothing(toolchain):
+    write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    miss = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat', '--cache')
+
+    # age the cache entry, the executable installed from it must still be new
+    for directory, _, names in os.walk(os.path.join(toolchain.cache_dir, 'artifacts')):
+        for name in names:
+            os.utime(os.path.join(directory, name), (time.time() - 3600, time.time() - 3600))
+
+    hit = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat_again', '--cache')
+
+    assert miss.returncode == 0, miss.stderr
+    assert hit.returncode == 0, hit.stderr
+
+    assert miss.spawns['jp2a'] == 4
+    assert hit.spawns == {}
+    assert os.access(os.path.join(toolchain.root, 'cat_again'), os.X_OK)
+
+    assert os.path.getmtime(os.path.join(toolchain.root, 'cat_again')) >= \
+           os.path.getmtime(os.path.join(toolchain.root, 'cat.gif'))
+
+    stats = toolchain.giftoa('--cache-stats')
+
+    assert re.search(r'hits:\s*1\b', stats.stdout)
+    assert re.search(r'misses:\s*1\b', stats.stdout)
+
+
+def test_artifact_cache_hit_into_missing_directory(toolchain):
+    write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    toolchain.giftoa('-i', 'cat.gif', '-o', 'cat', '--cache')
+    run = toolchain.giftoa('-i', 'cat.gif', '-o', os.path.join('missing', 'cat'), '--cache')
+
+    assert run.returncode == 1
+    assert 'Traceback' not in run.stderr
+    assert 'Unable to write executable' in run.stderr
+
+
+def test_artifact_cache_misses_when_input_changes(toolchain):
+    gif_path = write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    toolchain.giftoa('-i', 'cat.gif', '-o', 'cat', '--cache')
+    write_gif(gif_path, seed=1)
+    run = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat', '--cache')
+
+    assert run.returncode == 0, run.stderr
+    assert run.spawns['jp2a'] == 4
+
+
+def test_max_memory_splits_compilation(toolchain):
+    save_dir = os.path.join(toolchain.root, 'sources')
+    os.makedirs(save_dir)
+
+    toolchain.configure('convert', frames=4)
+    toolchain.configure('cc', save_dir=save_dir)
+    write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    run = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat', '--max-memory', '300')
+
+    assert run.returncode == 0, run.stderr
+
+    compile_runs = [cc for cc in run.runs_of('cc') if '-c' in cc['args']]
+    link_runs = [cc for cc in run.runs_of('cc') if '-c' not in cc['args']]
+
+    assert len(compile_runs) > 1
+    assert len(link_runs) == 1
+
+    # only one compiler runs at a time
+    for previous, following in zip(compile_runs, compile_runs[1:]):
+        assert previous['end'] <= following['start']
+
+    objects = [cc['args'][cc['args'].index('-o') + 1] for cc in compile_runs]
+    assert all(object_file in link_runs[0]['args'] for object_file in objects)
+
+
+def test_max_temp_disk_decodes_in_chunks(toolchain):
+    toolchain.configure('convert', frames=6)
+    toolchain.configure('identify', frames=6)
+    write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    run = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat', '--max-temp-disk', '1K')
+
+    assert run.returncode == 0, run.stderr
+    assert run.spawns['identify'] == 1
+    assert run.spawns['convert'] > 1
+    assert run.spawns['jp2a'] == 6
+
+    scenes = [convert['args'][convert['args'].index('-scene') + 1] for convert in run.runs_of('convert')]
+    assert scenes == sorted(scenes, key=int)
+
+
+def test_max_temp_disk_needs_identify(toolchain):
+    toolchain.configure('identify', fail=True)
+    write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    run = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat', '--max-temp-disk', '1K')
+
+    assert run.returncode == 2
+    assert 'identify' in run.stderr
+    assert run.spawns['convert'] == 0
+    assert run.spawns['cc'] == 0
+
+
+def test_failed_convert_stops_build(toolchain):
+    toolchain.configure('convert', fail=True)
+    write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    for budget in ([], ['--max-temp-disk', '1K']):
+        run = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat', *budget)
+
+        assert run.returncode == 2
+        assert 'Failed decoding frames' in run.stderr
+        assert run.spawns['jp2a'] == 0
+        assert run.spawns['cc'] == 0
+        assert not os.path.exists(os.path.join(toolchain.root, 'cat'))
+
+
+def test_gif_without_frames(toolchain):
+    toolchain.configure('convert', frames=0)
+    write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    run = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat')
+
+    assert run.returncode == 2
+    assert 'No frames were decoded' in run.stderr
+    assert run.spawns['cc'] == 0
+
+
+def test_artifact_cache_skips_unreadable_manifest_frames(toolchain):
+    write_jpeg(os.path.join(toolchain.root, '0.jpg'))
+
+    with open(os.path.join(toolchain.root, 'frames.txt'), 'w') as manifest:
+        manifest.write('0.jpg\nmissing.jpg\n')
+
+    uncached = toolchain.giftoa('--frame-manifest', 'frames.txt', '-o', 'out')
+    cached = toolchain.giftoa('--frame-manifest', 'frames.txt', '-o', 'out', '--cache')
+
+    assert cached.returncode == uncached.returncode != 0
+    assert 'Traceback' not in cached.stderr
+    assert cached.spawns['jp2a'] == uncached.spawns['jp2a']
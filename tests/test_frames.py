@@ -0,0 +1,198 @@
+# Copyright (c) 2016, Teriks
+# All rights reserved.
+
+# test_frames.py is part of giftoa
+
+# giftoa is distributed under the following BSD 3-Clause License
+
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer
+#    in the documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Color and raw ANSI frame generation, frame ingestion, and --live playback.
+
+import os
+import re
+import subprocess
+import threading
+import time
+
+from conftest import read_saved_sources, write_gif, write_jpeg
+
+from giftoa import giftoa
+
+
+JP2A_CHARS = ' .:-=+*#%@'
+
+
+def get_colored_lines(width=80, height=24):
+    # like jp2a --colors, every character gets its own escape sequence, and the color
+    # changes gradually across the frame
+    lines = []
+
+    for row in range(height):
+        line = ''
+        for column in range(width):
+            value = 60 + column * 2 + row
+            line += '\x1b[38;2;{r};{g};0m{char}'.format(r=min(255, value), g=value // 3,
+                                                       char=JP2A_CHARS[(column + row) % len(JP2A_CHARS)])
+        lines.append(line + '\x1b[0m')
+
+    return lines
+
+
+def strip_sgr(lines):
+    return [re.sub('\x1b\\[[0-9;]*m', '', line) for line in lines]
+
+
+def test_color_runs_keep_the_text():
+    lines = get_colored_lines()
+
+    runs = giftoa.parse_color_runs(lines)
+
+    assert ''.join(text for _, text in runs) == '\n'.join(line.rstrip() for line in strip_sgr(lines))
+    assert all(0 <= color < 16 for color, _ in runs)
+
+
+def test_color_runs_merge_whitespace():
+    runs = giftoa.parse_color_runs(['\x1b[31m#\x1b[32m \x1b[31m#\x1b[0m', '\x1b[31m#   \x1b[0m'])
+
+    # the space and the line break do not show a color, so they do not start a run
+    assert runs == [[1, '# #\n#']]
+
+
+def test_color_frame_size_close_to_monochrome():
+    lines = get_colored_lines()
+
+    colored = giftoa.build_ansi_frame(giftoa.parse_color_runs(lines))
+    monochrome = giftoa.build_ansi_frame(giftoa.get_frame_runs(strip_sgr(lines), False))
+
+    assert len(colored) < len(monochrome) * 1.5
+    assert len(colored) < len(''.join(lines)) / 4
+
+
+def test_ansi_frame_erases_what_it_does_not_draw():
+    frame = giftoa.build_ansi_frame(giftoa.get_frame_runs(['##', '#'], False))
+
+    assert frame == '\x1b[H##\x1b[K\n#\x1b[J'
+
+
+def test_raw_ansi_color_build(toolchain):
+    save_dir = os.path.join(toolchain.root, 'sources')
+    os.makedirs(save_dir)
+
+    toolchain.configure('convert', frames=3)
+    toolchain.configure('cc', save_dir=save_dir)
+    write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    curses_run = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat', '--colors')
+    curses_source, = read_saved_sources(save_dir)
+
+    assert curses_run.returncode == 0, curses_run.stderr
+
+    # the same checks which pass for --raw-ansi fail for the curses player
+    assert any('-lcurses' in cc['args'] for cc in curses_run.runs_of('cc'))
+    assert '#include <curses.h>' in curses_source
+
+    for name in os.listdir(save_dir):
+        os.unlink(os.path.join(save_dir, name))
+
+    run = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat', '--raw-ansi', '--colors')
+    source, = read_saved_sources(save_dir)
+
+    assert run.returncode == 0, run.stderr
+    assert all('--colors' in jp2a['args'] for jp2a in run.runs_of('jp2a'))
+    assert not any('-lcurses' in cc['args'] for cc in run.runs_of('cc'))
+    assert 'curses.h' not in source
+
+    lengths = re.search(r'#define GIFTOA_FRAME_LENGTHS_INIT \{(.*)\}', source).group(1).split(',')
+
+    assert len(lengths) == 3
+    assert all(int(length) > 0 for length in lengths)
+
+
+def test_ingest_workers_keep_frame_order(toolchain):
+    frames_dir = os.path.join(toolchain.root, 'frames')
+    os.makedirs(frames_dir)
+
+    for frame in range(20):
+        write_jpeg(os.path.join(frames_dir, 'frame{n}.jpg'.format(n=frame)), seed=frame)
+
+    expected = ['frame{n}.jpg'.format(n=frame) for frame in range(20)]
+
+    for workers in ('1', '4', '16'):
+        run = toolchain.giftoa('-i', 'frames', '-o', 'out', '--ingest-workers', workers)
+
+        assert run.returncode == 0, run.stderr
+        assert [os.path.basename(jp2a['args'][0]) for jp2a in run.runs_of('jp2a')] == expected
+
+
+def test_ingest_workers_reject_non_jpeg(toolchain):
+    paths = [write_jpeg(os.path.join(toolchain.root, '{n}.jpg'.format(n=frame)), seed=frame) for frame in range(4)]
+    paths.insert(2, write_gif(os.path.join(toolchain.root, 'cat.gif')))
+
+    run = toolchain.giftoa('--stdin-frames', '-o', 'out', '--ingest-workers', '4', input='\n'.join(paths).encode())
+
+    assert run.returncode != 0
+    assert run.spawns['cc'] == 0
+
+
+def test_live_shows_each_frame_as_it_arrives(toolchain):
+    paths = [write_jpeg(os.path.join(toolchain.root, '{n}.jpg'.format(n=frame)), seed=frame) for frame in range(3)]
+
+    process = toolchain.start_giftoa('--stdin-frames', '--live', stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    output = bytearray()
+    output_lock = threading.Lock()
+
+    def read_output():
+        while True:
+            data = os.read(process.stdout.fileno(), 65536)
+            if not data:
+                return
+            with output_lock:
+                output.extend(data)
+
+    reader = threading.Thread(target=read_output, daemon=True)
+    reader.start()
+
+    def frames_shown():
+        with output_lock:
+            return output.count(giftoa.ANSI_CURSOR_HOME.encode())
+
+    try:
+        # stdin stays open while waiting, the frame for a path must not wait for the next path
+        for shown, path in enumerate(paths, start=1):
+            process.stdin.write((path + '\n').encode())
+            process.stdin.flush()
+
+            deadline = time.monotonic() + 10
+            while frames_shown() < shown and time.monotonic() < deadline:
+                time.sleep(0.05)
+
+            assert frames_shown() == shown
+
+        process.stdin.close()
+
+        assert process.wait(timeout=30) == 0, process.stderr.read().decode()
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        reader.join(timeout=10)
+        process.stdout.close()
+        process.stderr.close()
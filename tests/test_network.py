@@ -0,0 +1,89 @@
+# Copyright (c) 2016, Teriks
+# All rights reserved.
+
+# test_network.py is part of giftoa
+
+# giftoa is distributed under the following BSD 3-Clause License
+
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer
+#    in the documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# GIF downloads and rightgif searches, served by the local HTTP stand-in.
+
+import os
+
+
+GIF_DATA = b'GIF89a' + b'\x00' * 32
+
+
+def test_url_input_is_downloaded_once(toolchain, http_stand_in):
+    http_stand_in.files['/cat.gif'] = GIF_DATA
+
+    run = toolchain.giftoa('-i', http_stand_in.url('/cat.gif'), '-o', 'cat')
+
+    assert run.returncode == 0, run.stderr
+    assert http_stand_in.requests == [('GET', '/cat.gif')]
+    assert run.spawns == {'convert': 1, 'jp2a': 4, 'cc': 1}
+    assert os.access(os.path.join(toolchain.root, 'cat'), os.X_OK)
+
+
+def test_url_input_not_found(toolchain, http_stand_in):
+    run = toolchain.giftoa('-i', http_stand_in.url('/missing.gif'), '-o', 'cat')
+
+    assert run.returncode == 2
+    assert 'Failed downloading' in run.stderr
+    assert run.spawns == {}
+
+
+def test_url_input_which_is_not_a_gif(toolchain, http_stand_in):
+    http_stand_in.files['/cat.gif'] = b'<html></html>'
+
+    run = toolchain.giftoa('-i', http_stand_in.url('/cat.gif'), '-o', 'cat')
+
+    assert run.returncode == 2
+    assert 'is not a GIF file' in run.stderr
+    assert run.spawns == {}
+
+
+def test_rightgif_search(toolchain, http_stand_in):
+    http_stand_in.search_results['happy cat'] = http_stand_in.url('/cat.gif')
+
+    run = toolchain.rightgif('happy', 'cat',
+                             extra_environment={'RIGHTGIF_SEARCH_URL': http_stand_in.url('/search/web')})
+
+    assert run.returncode == 0, run.stderr
+    assert run.stdout.strip() == http_stand_in.url('/cat.gif')
+    assert http_stand_in.requests == [('POST', '/search/web')]
+
+
+def test_rightgif_bad_response(toolchain, http_stand_in):
+    run = toolchain.rightgif('no', 'results',
+                             extra_environment={'RIGHTGIF_SEARCH_URL': http_stand_in.url('/search/web')})
+
+    assert run.returncode == 1
+    assert 'Error decoding JSON response' in run.stderr
+
+
+def test_rightgif_result_into_giftoa(toolchain, http_stand_in):
+    http_stand_in.files['/cat.gif'] = GIF_DATA
+    http_stand_in.search_results['cat'] = http_stand_in.url('/cat.gif')
+
+    search = toolchain.rightgif('cat', extra_environment={'RIGHTGIF_SEARCH_URL': http_stand_in.url('/search/web')})
+    build = toolchain.giftoa('-i', search.stdout.strip(), '-o', 'cat')
+
+    assert build.returncode == 0, build.stderr
+    assert http_stand_in.requests == [('POST', '/search/web'), ('GET', '/cat.gif')]
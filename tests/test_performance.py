@@ -0,0 +1,108 @@
+# Copyright (c) 2016, Teriks
+# All rights reserved.
+
+# test_performance.py is part of giftoa
+
+# giftoa is distributed under the following BSD 3-Clause License
+
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer
+#    in the documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Elapsed time budgets.  The stand-in tools are given a scripted latency which dominates
+# the run time, so the budgets hold on slow machines, and a feature which stops saving
+# that time fails its budget instead of silently getting slower.
+
+import os
+import subprocess
+import sys
+
+from conftest import src_path, write_gif
+
+
+JP2A_LATENCY = 0.1
+CC_LATENCY = 0.3
+
+
+def test_cache_hit_skips_rendering_and_compiling(toolchain):
+    toolchain.configure('convert', frames=8)
+    toolchain.configure('jp2a', latency=JP2A_LATENCY)
+    toolchain.configure('cc', latency=CC_LATENCY)
+    write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    miss = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat', '--cache')
+    hit = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat', '--cache')
+
+    assert miss.returncode == 0, miss.stderr
+    assert hit.returncode == 0, hit.stderr
+
+    assert miss.elapsed >= 8 * JP2A_LATENCY + CC_LATENCY
+    assert hit.elapsed < miss.elapsed / 3
+
+
+def test_known_toolchain_skips_lrt_probe(toolchain):
+    toolchain.configure('cc', latency=CC_LATENCY, fail=True, fail_arg='-lrt')
+    write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    first = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat')
+    second = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat')
+
+    assert first.returncode == 0, first.stderr
+    assert second.returncode == 0, second.stderr
+
+    assert second.tool_time('cc') < first.tool_time('cc') - CC_LATENCY / 2
+
+
+def test_max_memory_compiles_while_rendering(toolchain):
+    toolchain.configure('convert', frames=6)
+    toolchain.configure('jp2a', latency=JP2A_LATENCY)
+    toolchain.configure('cc', latency=JP2A_LATENCY)
+    write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    run = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat', '--max-memory', '300')
+
+    assert run.returncode == 0, run.stderr
+
+    compile_runs = [cc for cc in run.runs_of('cc') if '-c' in cc['args']]
+
+    assert any(cc['start'] < jp2a['end'] and jp2a['start'] < cc['end']
+               for cc in compile_runs for jp2a in run.runs_of('jp2a'))
+
+    # only the last translation unit is left to compile once rendering is done
+    rendering_end = max(jp2a['end'] for jp2a in run.runs_of('jp2a'))
+
+    assert len([cc for cc in compile_runs if cc['start'] >= rendering_end]) <= 1
+
+
+# A cached build spawns no tools.  The stand-in compiler is slower than the budget, so
+# probing the compiler again on every run of giftoa fails it.
+
+PROBE_LATENCY = 1.0
+STARTUP_BUDGET_MS = 700
+
+
+def test_startup_defers_optional_imports(toolchain):
+    toolchain.configure('convert', frames=1)
+    toolchain.configure('cc', latency=PROBE_LATENCY)
+    write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    startup = subprocess.run([sys.executable, os.path.join(src_path, 'benchmarks', 'startup.py'), '-n', '3',
+                              '--build', 'cat.gif', '--max-ms', str(STARTUP_BUDGET_MS)],
+                             stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                             env=toolchain.environment(), cwd=toolchain.root)
+
+    assert startup.returncode == 0, startup.stdout.decode()
+    assert 'cached build' in startup.stdout.decode()
@@ -0,0 +1,144 @@
+# Copyright (c) 2016, Teriks
+# All rights reserved.
+
+# test_players.py is part of giftoa
+
+# giftoa is distributed under the following BSD 3-Clause License
+
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer
+#    in the documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# The generated players built with the real C compiler, and run on a pseudo terminal.
+# The stand-in compiler accepts any source, so these are the only tests which catch
+# mistakes in the generated C.  They are skipped when no C compiler with curses is found.
+
+import itertools
+import os
+import select
+import shlex
+import shutil
+import subprocess
+import tempfile
+import time
+
+import pytest
+
+from conftest import write_gif
+
+
+def find_real_compiler():
+    compiler = shutil.which('cc')
+    if compiler is None:
+        return None
+
+    with tempfile.TemporaryDirectory() as probe_dir:
+        source_path = os.path.join(probe_dir, 'probe.c')
+        with open(source_path, 'w') as source_file:
+            source_file.write('#include <curses.h>\nint main(void) { initscr(); endwin(); return 0; }\n')
+
+        probe = subprocess.run([compiler, source_path, '-o', os.path.join(probe_dir, 'probe'), '-lcurses'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    return compiler if probe.returncode == 0 else None
+
+
+real_compiler = find_real_compiler()
+
+requires_real_compiler = pytest.mark.skipif(real_compiler is None, reason='no C compiler with curses found')
+
+
+# Run a player on a pseudo terminal, press Esc once it has drawn, and return
+# its exit status and everything it wrote to the terminal.
+
+def play_on_terminal(executable_path):
+    master, slave = os.openpty()
+
+    player = subprocess.Popen([executable_path], stdin=slave, stdout=slave, stderr=slave,
+                              env=dict(os.environ, TERM='xterm'), start_new_session=True)
+    os.close(slave)
+
+    output = bytearray()
+
+    def read_for(seconds):
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if select.select([master], [], [], 0.05)[0]:
+                try:
+                    output.extend(os.read(master, 65536))
+                except OSError:
+                    return
+
+    try:
+        read_for(1)
+        os.write(master, b'\x1b')
+
+        deadline = time.monotonic() + 10
+        while player.poll() is None and time.monotonic() < deadline:
+            read_for(0.1)
+
+        return player.poll(), bytes(output)
+    finally:
+        if player.poll() is None:
+            player.kill()
+            player.wait()
+        os.close(master)
+
+
+# Write a compiler script which logs the arguments of every compile and runs the real compiler.
+
+def write_logging_compiler(directory):
+    compiler_path = os.path.join(directory, 'logging-cc')
+    log_path = os.path.join(directory, 'compiler_log.txt')
+
+    with open(compiler_path, 'w') as compiler_file:
+        compiler_file.write('#!/bin/sh\necho "$*" >> {log}\nexec {cc} "$@"\n'.format(log=shlex.quote(log_path),
+                                                                                   cc=shlex.quote(real_compiler)))
+    os.chmod(compiler_path, 0o755)
+
+    return compiler_path, log_path
+
+
+@requires_real_compiler
+@pytest.mark.parametrize('options', [list(itertools.compress(['--raw-ansi', '--colors', '--max-memory'], chosen))
+                                     for chosen in itertools.product([False, True], repeat=3)],
+                         ids=lambda options: ' '.join(options) or 'curses')
+def test_player_compiles_and_plays(toolchain, options):
+    toolchain.configure('convert', frames=4, distinct=3)
+    write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    compiler_path, compiler_log_path = write_logging_compiler(toolchain.root)
+
+    split = '--max-memory' in options
+    if split:
+        # small enough to put the frames in several translation units
+        options = options + ['300']
+
+    run = toolchain.giftoa('-i', 'cat.gif', '-o', 'cat', '-cc', compiler_path, '-fps', '20', *options)
+
+    assert run.returncode == 0, run.stderr
+
+    with open(compiler_log_path) as compiler_log:
+        compiles = [line.split() for line in compiler_log if '--version' not in line]
+
+    assert (len([args for args in compiles if '-c' in args]) > 1) == split
+
+    status, output = play_on_terminal(os.path.join(toolchain.root, 'cat'))
+
+    assert status == 0, output.decode(errors='replace')
+
+    # the stand-in jp2a's frames are made of these characters
+    assert any(char in output for char in b'.:-=+*#%@')
@@ -0,0 +1,190 @@
+# Copyright (c) 2016, Teriks
+# All rights reserved.
+
+# test_serve.py is part of giftoa
+
+# giftoa is distributed under the following BSD 3-Clause License
+
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer
+#    in the documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived
+#    from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Builds requested from a running giftoa serve, and the metrics it reports.
+
+import contextlib
+import json
+import os
+import signal
+import subprocess
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import pytest
+
+from conftest import write_gif
+
+
+class ServeClient:
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def request(self, method, path, args=(), body=None):
+        url = self.base_url + path
+        if args:
+            url += '?' + urllib.parse.urlencode([('arg', arg) for arg in args])
+
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, data=body, method=method), timeout=60) as reply:
+                return reply.status, reply.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def build(self, *args, body=None):
+        return self.request('POST', '/build', args, body)
+
+    def metrics(self):
+        status, body = self.request('GET', '/metrics')
+        assert status == 200
+        return json.loads(body.decode())
+
+
+@contextlib.contextmanager
+def run_serve(toolchain, *options):
+    process = toolchain.start_giftoa('serve', '--port', '0', *options,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    try:
+        listening = process.stderr.readline().decode()
+        assert 'listening on' in listening, listening
+
+        yield ServeClient(listening.split()[4])
+    finally:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        process.stderr.close()
+
+
+@pytest.fixture
+def serve(toolchain):
+    with run_serve(toolchain, '-j', '2') as client:
+        yield client
+
+
+def test_serve_build_round_trip(toolchain, serve):
+    toolchain.configure('convert', frames=3)
+
+    with open(write_gif(os.path.join(toolchain.root, 'cat.gif')), 'rb') as gif_file:
+        gif_data = gif_file.read()
+
+    for _ in range(2):
+        status, body = serve.build('-fps', '25', body=gif_data)
+
+        assert status == 200, body
+        assert body.startswith(b'#!/bin/sh')
+
+    # every frame of every build is rendered, no build is served from another's output
+    spawns = [run['tool'] for run in toolchain.read_log()]
+
+    assert spawns.count('jp2a') == 6
+    assert spawns.count('convert') == 2
+
+    metrics = serve.metrics()
+
+    assert metrics['completed'] == 2
+    assert metrics['failed'] == 0
+    assert metrics['rejected'] == 0
+    assert metrics['queue_depth'] == 0
+    assert metrics['running'] == 0
+    assert metrics['latency_seconds']['count'] == 2
+
+
+def test_serve_failed_build(toolchain, serve):
+    toolchain.configure('jp2a', fail=True)
+
+    with open(write_gif(os.path.join(toolchain.root, 'cat.gif')), 'rb') as gif_file:
+        status, body = serve.build(body=gif_file.read())
+
+    assert status == 400
+
+    metrics = serve.metrics()
+
+    assert metrics['completed'] == 0
+    assert metrics['failed'] == 1
+
+
+def test_serve_queue_only_counts_waiting_builds(toolchain):
+    toolchain.configure('jp2a', latency=0.5)
+
+    with open(write_gif(os.path.join(toolchain.root, 'cat.gif')), 'rb') as gif_file:
+        gif_data = gif_file.read()
+
+    with run_serve(toolchain, '-j', '1', '--max-queue', '0') as serve:
+        # an idle worker takes a build even though nothing may wait in the queue
+        status, body = serve.build(body=gif_data)
+
+        assert status == 200, body
+
+        statuses = []
+        builds = [threading.Thread(target=lambda: statuses.append(serve.build(body=gif_data)[0]))
+                  for _ in range(2)]
+
+        for build in builds:
+            build.start()
+        for build in builds:
+            build.join()
+
+        assert sorted(statuses) == [200, 503]
+
+        metrics = serve.metrics()
+
+        assert metrics['completed'] == 2
+        assert metrics['rejected'] == 1
+
+
+@pytest.mark.parametrize('args', [['--inp', 'cat.gif'],
+                                  ['-ocat'],
+                                  ['--output=cat'],
+                                  ['--cache-stats'],
+                                  ['--stdin-frames'],
+                                  ['-fps'],
+                                  ['-cc', '/bin/sh'],
+                                  ['--compiler=/bin/sh']])
+def test_serve_rejects_reserved_args(toolchain, serve, args):
+    write_gif(os.path.join(toolchain.root, 'cat.gif'))
+
+    status, body = serve.build(*args, body=b'GIF89a')
+
+    assert status == 400, body
+    assert toolchain.read_log() == []
+
+    metrics = serve.metrics()
+
+    assert metrics['completed'] + metrics['failed'] == 0
+
+
+def test_serve_reserved_input_is_not_downloaded(serve, http_stand_in):
+    http_stand_in.files['/cat.gif'] = b'GIF89a'
+
+    status, body = serve.build('-i' + http_stand_in.url('/cat.gif'), body=b'GIF89a')
+
+    assert status == 400, body
+    assert http_stand_in.requests == []